@@ -0,0 +1,28 @@
+-- SQL Script to add the content fingerprint to an existing cards table
+-- Run this in Supabase Dashboard -> SQL Editor
+-- (new databases get it from schema.sql)
+
+-- Step 1: Fingerprint function (card numbers sorted ascending, comma separated)
+CREATE OR REPLACE FUNCTION card_fingerprint(numbers JSONB)
+RETURNS TEXT AS $$
+    SELECT string_agg(cell::text, ',' ORDER BY cell::int)
+    FROM jsonb_array_elements(numbers) AS card_row,
+         jsonb_array_elements(card_row) AS cell
+    WHERE cell <> 'null'::jsonb;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Step 2: Generated column, filled in for every existing card
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS fingerprint TEXT
+    GENERATED ALWAYS AS (card_fingerprint(numbers)) STORED;
+
+-- Step 3: Check for cards with the same numbers (must return no rows,
+-- otherwise delete the extra copies before Step 4)
+SELECT fingerprint, array_agg(id ORDER BY id) AS ids
+FROM cards
+GROUP BY fingerprint
+HAVING count(*) > 1;
+
+-- Step 4: Unique index, used by sync_cards.py to insert only missing cards
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_fingerprint ON cards(fingerprint);
+
+COMMENT ON COLUMN cards.fingerprint IS 'Sorted card numbers (generated from numbers), unique per card';
@@ -13,6 +13,22 @@ CREATE TABLE IF NOT EXISTS cards (
 -- Index for faster lookups by owner_uuid
 CREATE INDEX IF NOT EXISTS idx_cards_owner_uuid ON cards(owner_uuid);
 
+-- Content fingerprint: the card numbers sorted ascending, comma separated
+-- (e.g. '5,10,12,14,...'). Two cards share it exactly when they hold the
+-- same 15 numbers, so the unique index makes inserts idempotent.
+CREATE OR REPLACE FUNCTION card_fingerprint(numbers JSONB)
+RETURNS TEXT AS $$
+    SELECT string_agg(cell::text, ',' ORDER BY cell::int)
+    FROM jsonb_array_elements(numbers) AS card_row,
+         jsonb_array_elements(card_row) AS cell
+    WHERE cell <> 'null'::jsonb;
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE cards ADD COLUMN IF NOT EXISTS fingerprint TEXT
+    GENERATED ALWAYS AS (card_fingerprint(numbers)) STORED;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_fingerprint ON cards(fingerprint);
+
 -- Enable Row Level Security
 ALTER TABLE cards ENABLE ROW LEVEL SECURITY;
 
@@ -54,3 +70,4 @@ COMMENT ON COLUMN cards.id IS 'Unique card identifier';
 COMMENT ON COLUMN cards.numbers IS 'JSONB 3x9 matrix containing the card numbers (null for empty spaces)';
 COMMENT ON COLUMN cards.owner_uuid IS 'UUID of the device that claimed this card';
 COMMENT ON COLUMN cards.marked_numbers IS 'Array of numbers that have been marked by the user';
+COMMENT ON COLUMN cards.fingerprint IS 'Sorted card numbers (generated from numbers), unique per card';
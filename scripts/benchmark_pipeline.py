@@ -0,0 +1,402 @@
+"""
+Offline pipeline benchmarks: generation, validation, dedup, QR codes, PDF,
+Supabase uploads and claims (against the local stand-in of
+supabase_standin.py, with a fixed latency per request).
+
+Every benchmark runs in a fresh process so its peak RSS is its own.
+Results are saved as JSON and compared with a stored baseline; a benchmark
+is flagged as a regression when its throughput drops (or its peak memory
+grows) by more than the threshold.
+
+Esecuzione:
+    python benchmark_pipeline.py                      # run all, compare with baseline
+    python benchmark_pipeline.py --save-baseline      # run all, store as new baseline
+    python benchmark_pipeline.py --only pdf --quick   # subset, smaller sizes
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from queue import Empty
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = "benchmark_results.json"
+BASELINE_FILE = "benchmark_baseline.json"
+REGRESSION_THRESHOLD = 0.20  # 20% slower (or bigger) than baseline
+BENCHMARK_TIMEOUT = 1800  # Seconds before a benchmark process is killed and reported as failed
+
+GENERATION_SIZES = [1_000, 10_000, 100_000]
+QUICK_GENERATION_SIZES = [1_000, 10_000]
+
+PDF_MERGE_SIZE_TOLERANCE = 1.15  # Largest merged/single-process PDF size ratio
+UPLOAD_LATENCY = 0.02  # Seconds per request of the stand-in database (supabase_standin.py)
+UPLOAD_BATCH_SIZES = [1, 500]
+UPLOAD_CONCURRENCY = [1, 4]
+CLAIM_WORKERS = 10
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# =============================================================================
+# BENCHMARKS (each returns items processed, elapsed seconds, extra fields)
+# =============================================================================
+
+def bench_generate_unique_cards(num_cards, quick):
+    import generate_unique_cards as g
+    start = time.perf_counter()
+    g.generate_unique_cards(num_cards, seed=1)
+    return {"items": num_cards, "unit": "cards", "seconds": time.perf_counter() - start}
+
+
+def bench_validate_card_integrity(_, quick):
+    from card_engine import generate_card_batch, cards_to_lists
+    from card_validation import validate_card_integrity
+    cards = cards_to_lists(generate_card_batch(2_000 if quick else 20_000))
+    start = time.perf_counter()
+    for card in cards:
+        validate_card_integrity(card)
+    return {"items": len(cards), "unit": "cards", "seconds": time.perf_counter() - start}
+
+
+def bench_validate_cards(_, quick):
+    from card_engine import generate_card_batch
+    from card_validation import validate_cards
+    cards = generate_card_batch(100_000 if quick else 1_000_000)
+    start = time.perf_counter()
+    validate_cards(cards)
+    return {"items": len(cards), "unit": "cards", "seconds": time.perf_counter() - start}
+
+
+def bench_fingerprint_dedup(_, quick):
+    from card_engine import generate_card_batch
+    from card_fingerprint import fingerprint_words, first_occurrences
+    cards = generate_card_batch(100_000 if quick else 1_000_000)
+    start = time.perf_counter()
+    first_occurrences(fingerprint_words(cards))
+    return {"items": len(cards), "unit": "cards", "seconds": time.perf_counter() - start}
+
+
+def bench_generate_qr_codes(options, quick):
+    import generate_unique_cards as g
+    workers, fmt = options
+    card_ids = list(range(1, (2_000 if quick else 20_000) + 1))
+    with tempfile.TemporaryDirectory() as out_dir:
+        g.OUTPUT_DIR = out_dir
+        start = time.perf_counter()
+        g.generate_qr_codes(card_ids, workers, fmt)
+        seconds = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    return {"items": len(card_ids), "unit": "qr codes", "seconds": seconds, "output_bytes": size}
+
+
+def bench_generate_pdf(workers, quick):
+    import generate_pdf_cards as p
+    from card_engine import generate_card_batch, cards_to_lists
+    num_cards = 40 if quick else 200
+    with tempfile.TemporaryDirectory() as out_dir:
+        cards_file = os.path.join(out_dir, "cards.json")
+        with open(cards_file, 'w', encoding='utf-8') as f:
+            json.dump({"total_cards": num_cards, "cards": [
+                {"card_number": i + 1, "numbers": numbers}
+                for i, numbers in enumerate(cards_to_lists(generate_card_batch(num_cards)))
+            ]}, f)
+        p.CARDS_JSON_FILE = cards_file
+        p.START_CARD, p.END_CARD = 1, num_cards
+        # Shard even these few pages, so the merge is measured
+        p.PDF_MIN_PAGES_PER_WORKER = 1
+        p.OUTPUT_PDF = os.path.join(out_dir, "cards.pdf")
+        start = time.perf_counter()
+        p.generate_pdf(workers=workers or 1)
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(p.OUTPUT_PDF)
+        if workers:
+            # Merged shards must not carry duplicate copies of the shared resources
+            p.OUTPUT_PDF = os.path.join(out_dir, "single.pdf")
+            p.generate_pdf(workers=1)
+            single = os.path.getsize(p.OUTPUT_PDF)
+            assert size <= single * PDF_MERGE_SIZE_TOLERANCE, \
+                f"merged PDF is {size / single:.2f}x the single-process one ({size} vs {single} bytes)"
+    pages = -(-num_cards // p.CARDS_PER_PAGE)
+    return {"items": pages, "unit": "pages", "seconds": seconds, "output_bytes": size}
+
+
+def bench_generate_card_images(fmt, quick):
+    import generate_card_images as gi
+    from card_engine import generate_card_batch, cards_to_lists
+    num_cards = 100 if quick else 1000
+    cards = [{"card_number": i + 1, "numbers": numbers}
+             for i, numbers in enumerate(cards_to_lists(generate_card_batch(num_cards)))]
+    with tempfile.TemporaryDirectory() as out_dir:
+        result = gi.render_card_images(cards, out_dir, fmt=fmt)
+    return {"items": result["rendered"], "unit": "images", "seconds": result["seconds"],
+            "output_bytes": result["bytes"]}
+
+
+def _upload_cards_file(out_dir, num_cards):
+    from card_engine import generate_card_batch, cards_to_lists
+    cards_file = os.path.join(out_dir, "cards.json")
+    with open(cards_file, 'w', encoding='utf-8') as f:
+        json.dump({"cards": [
+            {"card_number": i + 1, "numbers": numbers}
+            for i, numbers in enumerate(cards_to_lists(generate_card_batch(num_cards)))
+        ]}, f)
+    return cards_file
+
+
+def bench_upload_cards(batch_size, quick):
+    """
+    Upload one request at a time over HTTP to the PostgREST stand-in, to
+    isolate the effect of the batch size.
+    """
+    from card_upload import upload_card_file
+    from supabase_standin import SupabaseStandIn
+    # Per-row uploads are slow by design: keep their run short
+    num_cards = (100 if quick else 500) if batch_size == 1 else (2_000 if quick else 20_000)
+    with tempfile.TemporaryDirectory() as out_dir, SupabaseStandIn(latency=UPLOAD_LATENCY) as standin:
+        cards_file = _upload_cards_file(out_dir, num_cards)
+        start = time.perf_counter()
+        _, ids = upload_card_file(cards_file, batch_size=batch_size, concurrency=1, restart=True,
+                                  url=standin.url)
+        seconds = time.perf_counter() - start
+        # A retried batch must never land twice
+        rows = len(standin.rows)
+    assert ids == list(range(1, num_cards + 1))
+    assert rows == num_cards, f"{rows} rows in the table for {num_cards} cards"
+    return {"items": num_cards, "unit": "rows", "seconds": seconds}
+
+
+def bench_upload_card_file(concurrency, quick):
+    from card_upload import upload_card_file
+    from supabase_standin import SupabaseStandIn
+    num_cards = 5_000 if quick else 50_000
+    with tempfile.TemporaryDirectory() as out_dir, SupabaseStandIn(latency=UPLOAD_LATENCY) as standin:
+        cards_file = _upload_cards_file(out_dir, num_cards)
+        start = time.perf_counter()
+        _, ids = upload_card_file(cards_file, concurrency=concurrency, restart=True, url=standin.url)
+        seconds = time.perf_counter() - start
+    assert None not in ids
+    return {"items": num_cards, "unit": "rows", "seconds": seconds}
+
+
+def bench_claim_cards(_, quick):
+    """Concurrent claims as in load_test.py --direct-db-test: list free cards, claim one at random."""
+    import random
+    import uuid
+    from concurrent.futures import ThreadPoolExecutor
+    from card_engine import generate_card_batch, cards_to_lists
+    from supabase import create_client
+    from card_upload import SUPABASE_KEY
+    from supabase_standin import SupabaseStandIn
+    num_cards = 200 if quick else 1_000
+    with SupabaseStandIn(latency=UPLOAD_LATENCY) as standin:
+        standin.add_cards(cards_to_lists(generate_card_batch(num_cards)))
+        client = create_client(standin.url, SUPABASE_KEY)
+
+        def claim(user):
+            rng = random.Random(user)
+            free = client.table("cards").select("id").is_("owner_uuid", None).limit(50).execute().data
+            if not free:
+                return False
+            card_id = rng.choice(free)["id"]
+            res = client.table("cards").update({"owner_uuid": str(uuid.UUID(int=user))}) \
+                .eq("id", card_id).is_("owner_uuid", None).execute()
+            return bool(res.data)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CLAIM_WORKERS) as pool:
+            claimed = sum(pool.map(claim, range(num_cards)))
+        seconds = time.perf_counter() - start
+    return {"items": num_cards, "unit": "claims", "seconds": seconds, "claimed": claimed}
+
+
+def benchmark_plan(quick):
+    """List of (name, function, size) to run."""
+    sizes = QUICK_GENERATION_SIZES if quick else GENERATION_SIZES
+    plan = [(f"generate_unique_cards[{n}]", bench_generate_unique_cards, n) for n in sizes]
+    plan += [
+        ("validate_card_integrity", bench_validate_card_integrity, None),
+        ("validate_cards", bench_validate_cards, None),
+        ("fingerprint_dedup", bench_fingerprint_dedup, None),
+        ("generate_pdf", bench_generate_pdf, None),
+    ]
+    # Sharded rendering merged with pypdf: at least 2 workers, so the merge is always measured
+    plan += [(f"generate_pdf[workers={w}]", bench_generate_pdf, w) for w in sorted({2, os.cpu_count() or 1} - {1})]
+    plan += [(f"generate_qr_codes[workers={w}]", bench_generate_qr_codes, (w, "png"))
+             for w in sorted({1, os.cpu_count() or 1})]
+    plan += [(f"generate_qr_codes[format={f}]", bench_generate_qr_codes, (1, f)) for f in ("svg", "matrix")]
+    plan += [(f"generate_card_images[format={f}]", bench_generate_card_images, f) for f in ("webp", "png")]
+    plan += [(f"upload_cards[batch={b}]", bench_upload_cards, b) for b in UPLOAD_BATCH_SIZES]
+    plan += [(f"upload_card_file[concurrency={c}]", bench_upload_card_file, c) for c in UPLOAD_CONCURRENCY]
+    plan.append(("claim_cards", bench_claim_cards, None))
+    return plan
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+def _run_in_child(func, size, quick, queue):
+    os.chdir(SCRIPTS_DIR)
+    sys.path.insert(0, SCRIPTS_DIR)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(size, quick)
+        result["peak_rss_mb"] = _peak_rss_mb()
+        queue.put(result)
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_benchmark(func, size, quick):
+    """Run one benchmark in a fresh process and return its result dict."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_in_child, args=(func, size, quick, queue))
+    process.start()
+
+    # A crashed or OOM-killed child never puts a result: poll, and give up
+    # once it has exited or run for BENCHMARK_TIMEOUT seconds
+    deadline = time.monotonic() + BENCHMARK_TIMEOUT
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1.0)
+        except Empty:
+            if not process.is_alive():
+                try:
+                    result = queue.get(timeout=1.0)  # Put just before exiting
+                except Empty:
+                    result = {"error": f"benchmark process exited with code {process.exitcode} without a result"}
+            elif time.monotonic() > deadline:
+                process.terminate()
+                result = {"error": f"timed out after {BENCHMARK_TIMEOUT}s"}
+    process.join()
+
+    if "error" not in result:
+        result["items_per_sec"] = result["items"] / result["seconds"] if result["seconds"] else None
+    return result
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Compare throughput and peak RSS with the baseline.
+
+    Returns:
+        list of regression messages
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "error" in result or "error" in base:
+            continue
+        if base.get("items_per_sec") and result["items_per_sec"] < base["items_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['items_per_sec']:.1f} {result['unit']}/sec "
+                f"(baseline {base['items_per_sec']:.1f})"
+            )
+        if base.get("peak_rss_mb") and result.get("peak_rss_mb") and \
+                result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(
+                f"{name}: peak RSS {result['peak_rss_mb']} MB (baseline {base['peak_rss_mb']} MB)"
+            )
+    return regressions
+
+
+def print_result(name, result):
+    if "error" in result:
+        print(f"  [ERROR] {name}: {result['error']}")
+        return
+    line = f"  [OK] {name:32s} {result['items_per_sec']:>12,.1f} {result['unit']}/sec"
+    if result.get("peak_rss_mb") is not None:
+        line += f"   peak RSS {result['peak_rss_mb']:>7.1f} MB"
+    if result.get("output_bytes") is not None:
+        line += f"   output {result['output_bytes'] / 1024:,.0f} KB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the offline card pipeline")
+    parser.add_argument("--only", action="append", default=[],
+                        help="Run only benchmarks whose name contains this text (repeatable)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Smaller sizes for a fast smoke run")
+    parser.add_argument("--output", default=RESULTS_FILE,
+                        help=f"Where to save the results (default: {RESULTS_FILE})")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help=f"Baseline to compare with (default: {BASELINE_FILE})")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"Relative change flagged as regression (default: {REGRESSION_THRESHOLD})")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TOMBOLA PIPELINE BENCHMARK")
+    print("=" * 60)
+
+    results = {}
+    for name, func, size in benchmark_plan(args.quick):
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        results[name] = run_benchmark(func, size, args.quick)
+        print_result(name, results[name])
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"[WARNING] No baseline at {args.baseline} (create one with --save-baseline)")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != args.quick:
+        print("[WARNING] Baseline was recorded with a different --quick setting")
+
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n[ERROR] {len(regressions)} regression(s) against {args.baseline}:")
+        for message in regressions:
+            print(f"    - {message}")
+        sys.exit(1)
+    print(f"[OK] No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,685 @@
+"""
+Vectorized Tombola card engine.
+
+Cards are handled as (N, 3, 7) uint8 arrays where 0 marks an empty cell.
+All the heavy lifting (layout selection, per-column sampling, vertical
+sorting) is done with array operations; the JSON list-of-lists form with
+None for empty cells is only produced at the output edge by cards_to_lists().
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from card_fingerprint import (
+    FINGERPRINT_BITS, FingerprintBloomFilter, fingerprint_words, fingerprint_bits, mix64,
+    first_occurrences, within_overlap
+)
+
+GRID_ROWS = 3
+GRID_COLS = 7
+NUMBERS_PER_ROW = 5
+NUMBERS_PER_CARD = GRID_ROWS * NUMBERS_PER_ROW
+
+# Column ranges covering 1-90 (same as generate_tombola_card in generate_cards.py)
+COL_RANGES = [
+    (1, 13), (14, 26), (27, 39), (40, 52), (53, 65), (66, 78), (79, 90)
+]
+COL_START = np.array([lo for lo, _ in COL_RANGES], dtype=np.uint8)
+COL_SIZE = np.array([hi - lo + 1 for lo, hi in COL_RANGES], dtype=np.int64)
+MAX_COL_SIZE = int(COL_SIZE.max())
+
+# The 21 ways of choosing 5 filled cells out of 7 in a single row
+ROW_PATTERNS = np.array(
+    [[c in cols for c in range(GRID_COLS)]
+     for cols in combinations(range(GRID_COLS), NUMBERS_PER_ROW)],
+    dtype=bool
+)
+
+def _default_rng(rng):
+    return rng if rng is not None else np.random.default_rng()
+
+
+def random_layouts(n, rng=None):
+    """
+    Pick a random filled/empty structure for n cards.
+
+    Every row independently gets one of the 21 five-of-seven patterns.
+
+    Returns:
+        (n, 3, 7) bool array, True where the cell holds a number
+    """
+    rng = _default_rng(rng)
+    return ROW_PATTERNS[rng.integers(0, len(ROW_PATTERNS), size=(n, GRID_ROWS))]
+
+
+def random_column_offsets(n, rng=None):
+    """
+    Draw 3 distinct offsets per column for n cards.
+
+    The offsets are drawn one after the other without replacement, so any
+    prefix of length k is a uniform k-subset of the column range.
+
+    Returns:
+        (n, 7, 3) int64 array of offsets from the column start
+    """
+    rng = _default_rng(rng)
+    # Draw o_j uniformly among the S - j offsets not taken yet, then shift it
+    # past the offsets already taken (in increasing order)
+    remaining = COL_SIZE[None, :, None] - np.arange(GRID_ROWS)[None, None, :]
+    draws = (rng.random((n, GRID_COLS, GRID_ROWS)) * remaining).astype(np.int64)
+    first, second, third = draws[:, :, 0], draws[:, :, 1], draws[:, :, 2]
+
+    second += second >= first
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    third += third >= low
+    third += third >= high
+    return draws
+
+
+def place_columns(layouts, col_values):
+    """
+    Fill a batch of layouts with per-column values.
+
+    Args:
+        layouts: (N, 3, 7) bool array of filled cells
+        col_values: (N, 7, 3) array; for a column with k filled cells the
+            first k entries are the column numbers in ascending order
+
+    Returns:
+        (N, 3, 7) uint8 card array (0 = empty cell)
+    """
+    # Position of each filled cell inside its column, counted top to bottom
+    slot = np.cumsum(layouts, axis=1) - 1
+    slot = np.clip(slot, 0, GRID_ROWS - 1).transpose(0, 2, 1)  # (N, 7, 3)
+    values = np.take_along_axis(col_values, slot, axis=2).transpose(0, 2, 1)
+    return np.where(layouts, values, 0).astype(np.uint8)
+
+
+def generate_card_batch(n, rng=None):
+    """
+    Generate n valid Tombola cards at once.
+
+    Same rules and distribution as generate_tombola_card() in generate_cards.py:
+    5 numbers per row, column ranges covering 1-90, numbers sorted top to bottom.
+
+    Args:
+        n: Number of cards to generate
+        rng: Optional numpy.random.Generator
+
+    Returns:
+        (n, 3, 7) uint8 array (0 = empty cell)
+    """
+    rng = _default_rng(rng)
+    layouts = random_layouts(n, rng)
+    offsets = random_column_offsets(n, rng)
+
+    # Keep only as many offsets as the column has filled cells, sort them
+    counts = layouts.sum(axis=1)  # (n, 7)
+    unused = np.arange(GRID_ROWS)[None, None, :] >= counts[:, :, None]
+    offsets = np.sort(np.where(unused, MAX_COL_SIZE, offsets), axis=2)
+
+    return place_columns(layouts, offsets + COL_START[None, :, None])
+
+
+def cards_to_lists(cards):
+    """
+    Convert a (N, 3, 7) card array to the JSON form (nested lists, None for empty cells).
+    """
+    return [
+        [[num or None for num in row] for row in card]
+        for card in np.asarray(cards).tolist()
+    ]
+
+
+def cards_from_lists(cards):
+    """
+    Convert JSON-form cards (3x7 nested lists with None) to a (N, 3, 7) uint8 array.
+
+    Raises:
+        ValueError: if a card is not a 3x7 matrix
+    """
+    arr = np.zeros((len(cards), GRID_ROWS, GRID_COLS), dtype=np.uint8)
+    for i, card in enumerate(cards):
+        if len(card) != GRID_ROWS or any(len(row) != GRID_COLS for row in card):
+            raise ValueError(f"Card at index {i} is not a {GRID_ROWS}x{GRID_COLS} matrix")
+        arr[i] = [[num or 0 for num in row] for row in card]
+    return arr
+
+
+def card_numbers(cards):
+    """
+    Return the 15 numbers of each card, sorted ascending.
+
+    Args:
+        cards: (N, 3, 7) card array
+
+    Returns:
+        (N, 15) uint8 array
+    """
+    flat = np.sort(np.asarray(cards).reshape(len(cards), -1), axis=1)
+    return flat[:, -NUMBERS_PER_CARD:]
+
+
+# --- Combinatorial ranking ---
+#
+# A valid card is fully described by its column counts (how many numbers
+# each column holds), its layout and, for every column, which numbers are
+# used. Cards are ordered by column-count vector first, then by number
+# choice (mixed radix over the columns, colex order inside a column), then
+# by layout. This gives a bijection between valid cards and the integers in
+# [0, TOTAL_VALID_CARDS). Dropping the layout digit gives the same kind of
+# bijection for the sets of 15 numbers a card can hold, which is what
+# uniqueness is about.
+
+_BINOM = np.array(
+    [[comb(n, k) for k in range(GRID_ROWS + 1)] for n in range(MAX_COL_SIZE + 1)],
+    dtype=np.int64
+)
+
+
+def _colex_table():
+    """
+    Every k-subset of a column (k = 0..3) in colex order, padded with MAX_COL_SIZE.
+
+    The first C(s, k) rows for a given k are exactly the k-subsets of range(s).
+    """
+    table = np.full((GRID_ROWS + 1, comb(MAX_COL_SIZE, GRID_ROWS), GRID_ROWS), MAX_COL_SIZE, dtype=np.int64)
+    for k in range(GRID_ROWS + 1):
+        subsets = sorted(combinations(range(MAX_COL_SIZE), k), key=lambda subset: subset[::-1])
+        for i, subset in enumerate(subsets):
+            table[k, i, :k] = subset
+    return table
+
+
+_COMBOS = _colex_table()
+
+# All 21^3 layouts, identified by p0 * 441 + p1 * 21 + p2 (row pattern indices)
+_N_PATTERNS = len(ROW_PATTERNS)
+_ALL_LAYOUTS = ROW_PATTERNS[
+    np.stack(np.unravel_index(np.arange(_N_PATTERNS ** GRID_ROWS), (_N_PATTERNS,) * GRID_ROWS), axis=1)
+]
+_COUNT_WEIGHTS = 4 ** np.arange(GRID_COLS - 1, -1, -1)
+
+
+def _count_codes(counts):
+    return (counts * _COUNT_WEIGHTS).sum(axis=-1)
+
+
+_layout_codes = _count_codes(_ALL_LAYOUTS.sum(axis=1))
+
+# Column-count vectors in increasing code order (lexicographic), and the
+# layouts compatible with each of them
+COUNT_VECTORS = np.array(
+    [np.unravel_index(code, (4,) * GRID_COLS) for code in np.unique(_layout_codes)],
+    dtype=np.int64
+)
+_GROUP_OF_CODE = np.full(4 ** GRID_COLS, -1, dtype=np.int64)
+_GROUP_OF_CODE[_count_codes(COUNT_VECTORS)] = np.arange(len(COUNT_VECTORS))
+
+_layout_groups = _GROUP_OF_CODE[_layout_codes]
+_GROUP_LAYOUTS = np.argsort(_layout_groups, kind="stable")
+_GROUP_LAYOUT_COUNT = np.bincount(_layout_groups, minlength=len(COUNT_VECTORS))
+_GROUP_LAYOUT_START = np.concatenate([[0], np.cumsum(_GROUP_LAYOUT_COUNT)[:-1]])
+_LAYOUT_POSITION = np.empty_like(_GROUP_LAYOUTS)
+_LAYOUT_POSITION[_GROUP_LAYOUTS] = np.arange(len(_GROUP_LAYOUTS)) - _GROUP_LAYOUT_START[_layout_groups[_GROUP_LAYOUTS]]
+
+_PATTERN_OF_MASK = np.full(2 ** GRID_COLS, -1, dtype=np.int64)
+_PATTERN_OF_MASK[(ROW_PATTERNS * (1 << np.arange(GRID_COLS))).sum(axis=1)] = np.arange(_N_PATTERNS)
+
+# Radix of every column digit, and the number of number sets per count vector
+_GROUP_RADIX = _BINOM[COL_SIZE[None, :], COUNT_VECTORS]
+_GROUP_SETS = np.prod(_GROUP_RADIX, axis=1)
+_SET_OFFSET = np.concatenate([[0], np.cumsum(_GROUP_SETS)])
+_CARD_OFFSET = np.concatenate([[0], np.cumsum(_GROUP_SETS * _GROUP_LAYOUT_COUNT)])
+
+TOTAL_NUMBER_SETS = int(_SET_OFFSET[-1])
+TOTAL_VALID_CARDS = int(_CARD_OFFSET[-1])
+
+
+def _rank_parts(cards):
+    """Split cards into (count-vector group, number rank, layout position)."""
+    cards = np.asarray(cards)
+    layouts = cards > 0
+    groups = _GROUP_OF_CODE[_count_codes(layouts.sum(axis=1))]
+
+    patterns = _PATTERN_OF_MASK[(layouts * (1 << np.arange(GRID_COLS))).sum(axis=2)]
+    layout_ids = (patterns * (_N_PATTERNS ** np.arange(GRID_ROWS - 1, -1, -1))).sum(axis=1)
+
+    # Colex rank of every column: sum of C(offset_t, t + 1) over the filled cells
+    offsets = np.sort(np.where(layouts, cards.astype(np.int64) - COL_START, MAX_COL_SIZE), axis=1)
+    terms = _BINOM[np.minimum(offsets, MAX_COL_SIZE), np.arange(1, GRID_ROWS + 1)[None, :, None]]
+    digits = np.where(offsets < MAX_COL_SIZE, terms, 0).sum(axis=1)  # (N, 7)
+
+    radix = _GROUP_RADIX[groups]
+    number_ranks = np.zeros(len(cards), dtype=np.int64)
+    for col in range(GRID_COLS):
+        number_ranks = number_ranks * radix[:, col] + digits[:, col]
+
+    return groups, number_ranks, _LAYOUT_POSITION[layout_ids]
+
+
+def _build_cards(groups, number_ranks, layout_positions):
+    """Inverse of _rank_parts()."""
+    radix = _GROUP_RADIX[groups]
+    digits = np.empty((len(groups), GRID_COLS), dtype=np.int64)
+    for col in range(GRID_COLS - 1, -1, -1):
+        number_ranks, digits[:, col] = np.divmod(number_ranks, radix[:, col])
+
+    offsets = _COMBOS[COUNT_VECTORS[groups], digits]  # (N, 7, 3), sorted
+    layouts = _ALL_LAYOUTS[_GROUP_LAYOUTS[_GROUP_LAYOUT_START[groups] + layout_positions]]
+    return place_columns(layouts, offsets + COL_START[None, :, None])
+
+
+def rank_cards(cards):
+    """
+    Map valid cards to their index in [0, TOTAL_VALID_CARDS).
+
+    Args:
+        cards: (N, 3, 7) card array of valid cards
+
+    Returns:
+        (N,) int64 array of card ranks
+    """
+    groups, number_ranks, layout_positions = _rank_parts(cards)
+    return _CARD_OFFSET[groups] + number_ranks * _GROUP_LAYOUT_COUNT[groups] + layout_positions
+
+
+def unrank_cards(ranks):
+    """
+    Rebuild cards from their rank (inverse of rank_cards).
+
+    Args:
+        ranks: Integers in [0, TOTAL_VALID_CARDS)
+
+    Returns:
+        (N, 3, 7) uint8 card array
+    """
+    ranks = np.asarray(ranks, dtype=np.int64).reshape(-1)
+    groups = np.searchsorted(_CARD_OFFSET, ranks, side="right") - 1
+    number_ranks, layout_positions = np.divmod(ranks - _CARD_OFFSET[groups], _GROUP_LAYOUT_COUNT[groups])
+    return _build_cards(groups, number_ranks, layout_positions)
+
+
+def number_set_ranks(cards):
+    """
+    Map valid cards to the index of their set of 15 numbers in [0, TOTAL_NUMBER_SETS).
+
+    Two cards get the same value exactly when they hold the same numbers.
+    """
+    groups, number_ranks, _ = _rank_parts(cards)
+    return _SET_OFFSET[groups] + number_ranks
+
+
+def unrank_number_sets(set_ranks, rng=None):
+    """
+    Build one card per number-set rank, with a random compatible layout.
+
+    Args:
+        set_ranks: Integers in [0, TOTAL_NUMBER_SETS)
+        rng: Optional numpy.random.Generator used to pick the layouts
+
+    Returns:
+        (N, 3, 7) uint8 card array
+    """
+    rng = _default_rng(rng)
+    set_ranks = np.asarray(set_ranks, dtype=np.int64).reshape(-1)
+    groups = np.searchsorted(_SET_OFFSET, set_ranks, side="right") - 1
+    layout_positions = (rng.random(len(groups)) * _GROUP_LAYOUT_COUNT[groups]).astype(np.int64)
+    return _build_cards(groups, set_ranks - _SET_OFFSET[groups], layout_positions)
+
+
+def sample_unique_cards(n, rng=None):
+    """
+    Draw n cards with pairwise distinct number sets, without rejection.
+
+    n distinct number-set ranks are drawn without replacement (uniformly over
+    all possible sets of numbers), then each gets a random compatible layout.
+
+    Returns:
+        (n, 3, 7) uint8 card array
+    """
+    rng = _default_rng(rng)
+    set_ranks = rng.choice(TOTAL_NUMBER_SETS, size=n, replace=False)
+    return unrank_number_sets(set_ranks, rng)
+
+
+# --- Sharded generation ---
+
+def _generate_shard(num_cards, seed_seq):
+    """Worker entry point: one shard of unique cards from its own stream."""
+    return sample_unique_cards(num_cards, np.random.default_rng(seed_seq))
+
+
+def _first_occurrences(cards):
+    """Drop cards whose number set already appeared earlier in the array."""
+    return cards[first_occurrences(fingerprint_words(cards))]
+
+
+def generate_sharded_cards(num_cards, workers=1, seed=None):
+    """
+    Generate unique cards in parallel shards with reproducible streams.
+
+    Each shard gets an independent numpy.random.Generator spawned from
+    SeedSequence(seed), shards are concatenated in shard order and cards
+    repeating a number set from an earlier shard are dropped. Missing cards
+    are topped up from further spawned streams, so the same (seed, workers)
+    pair always produces the same cards in the same order.
+
+    Args:
+        num_cards: Number of cards to generate
+        workers: Number of worker processes (and shards)
+        seed: Master seed; None draws fresh OS entropy
+
+    Returns:
+        (num_cards, 3, 7) uint8 card array
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    root = np.random.SeedSequence(seed)
+    shard_seeds = root.spawn(workers)
+    shard_sizes = [num_cards // workers + (i < num_cards % workers) for i in range(workers)]
+
+    if workers == 1:
+        shards = [_generate_shard(shard_sizes[0], shard_seeds[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_generate_shard, shard_sizes, shard_seeds))
+
+    cards = _first_occurrences(np.concatenate(shards))
+    while len(cards) < num_cards:
+        extra = _generate_shard(num_cards - len(cards), root.spawn(1)[0])
+        cards = _first_occurrences(np.concatenate([cards, extra]))
+
+    return cards
+
+
+# --- Full series (6 cards covering 1-90 exactly once) ---
+
+SERIES_SIZE = 6
+_SWITCH_ROUNDS = 200
+
+
+def random_series_counts(num_series, rng=None):
+    """
+    Allocate how many numbers each card of a series takes from each column.
+
+    Every (6, 7) count matrix has entries in 0-3, row sums of 15 (numbers
+    per card) and column sums equal to the column sizes (13 or 12). It
+    starts from a feasible matrix (2 everywhere plus one extra number per
+    card in a random column among 0-5) and is shuffled with random 2x2
+    switches (+1/-1/-1/+1), which keep every row and column sum unchanged.
+
+    Returns:
+        (num_series, 6, 7) int64 array
+    """
+    rng = _default_rng(rng)
+    counts = np.full((num_series, SERIES_SIZE, GRID_COLS), 2, dtype=np.int64)
+    extra_cols = np.argsort(rng.random((num_series, SERIES_SIZE)), axis=1)
+    np.put_along_axis(counts, extra_cols[:, :, None], 3, axis=2)
+
+    series = np.arange(num_series)
+    for _ in range(_SWITCH_ROUNDS):
+        a, b = (np.argsort(rng.random((num_series, SERIES_SIZE)), axis=1)[:, :2]).T
+        x, y = (np.argsort(rng.random((num_series, GRID_COLS)), axis=1)[:, :2]).T
+        ok = (
+            (counts[series, a, x] < GRID_ROWS) & (counts[series, b, y] < GRID_ROWS)
+            & (counts[series, a, y] > 0) & (counts[series, b, x] > 0)
+        )
+        s, a, b, x, y = series[ok], a[ok], b[ok], x[ok], y[ok]
+        counts[s, a, x] += 1
+        counts[s, b, y] += 1
+        counts[s, a, y] -= 1
+        counts[s, b, x] -= 1
+
+    return counts
+
+
+def random_layouts_for_counts(counts, rng=None):
+    """
+    Pick a random layout compatible with each column-count vector.
+
+    Args:
+        counts: (N, 7) column counts, entries 0-3 summing to 15
+
+    Returns:
+        (N, 3, 7) bool layouts
+    """
+    rng = _default_rng(rng)
+    groups = _GROUP_OF_CODE[_count_codes(counts)]
+    positions = (rng.random(len(groups)) * _GROUP_LAYOUT_COUNT[groups]).astype(np.int64)
+    return _ALL_LAYOUTS[_GROUP_LAYOUTS[_GROUP_LAYOUT_START[groups] + positions]]
+
+
+def generate_series(num_series, rng=None):
+    """
+    Generate full series: groups of 6 cards using every number 1-90 exactly once.
+
+    Each card is a valid Tombola card. The counts of every column are split
+    across the 6 cards by random_series_counts(), the column's numbers are
+    shuffled and dealt out accordingly, then placed top to bottom in a
+    random compatible layout.
+
+    Returns:
+        (num_series, 6, 3, 7) uint8 array
+    """
+    rng = _default_rng(rng)
+    counts = random_series_counts(num_series, rng)  # (S, 6, 7)
+
+    # Random permutation of every column's offsets (column 6 only has 12)
+    keys = rng.random((num_series, GRID_COLS, MAX_COL_SIZE))
+    keys[:, np.arange(MAX_COL_SIZE)[None, :] >= COL_SIZE[:, None]] = 2.0
+    perms = np.argsort(keys, axis=2)
+
+    # Card k of a series takes positions [start, start + count) of the permutation
+    starts = np.cumsum(counts, axis=1) - counts
+    slots = starts[..., None] + np.arange(GRID_ROWS)  # (S, 6, 7, 3)
+    unused = np.arange(GRID_ROWS) >= counts[..., None]
+    slots = np.where(unused, 0, slots)
+    offsets = np.take_along_axis(
+        perms[:, None, :, :].repeat(SERIES_SIZE, axis=1), slots, axis=3
+    )
+    offsets = np.sort(np.where(unused, MAX_COL_SIZE, offsets), axis=3)
+
+    flat_counts = counts.reshape(-1, GRID_COLS)
+    layouts = random_layouts_for_counts(flat_counts, rng)
+    cards = place_columns(layouts, offsets.reshape(-1, GRID_COLS, GRID_ROWS) + COL_START[None, :, None])
+    return cards.reshape(num_series, SERIES_SIZE, GRID_ROWS, GRID_COLS)
+
+
+def generate_unique_series(num_series, seed=None):
+    """
+    Generate full series whose cards are all pairwise distinct.
+
+    A series reusing the number set of a card from an earlier series is
+    replaced by a fresh one.
+
+    Returns:
+        (num_series, 6, 3, 7) uint8 array
+    """
+    rng = np.random.default_rng(seed)
+    series = generate_series(num_series, rng)
+    while True:
+        flat = series.reshape(-1, GRID_ROWS, GRID_COLS)
+        first = np.zeros(len(flat), dtype=bool)
+        first[first_occurrences(fingerprint_words(flat))] = True
+        # Series whose cards are all first occurrences are pairwise distinct
+        keep = np.flatnonzero(first.reshape(num_series, SERIES_SIZE).all(axis=1))
+        if len(keep) == num_series:
+            return series
+        series = np.concatenate([series[keep], generate_series(num_series - len(keep), rng)])
+
+
+# --- Overlap-bounded generation ---
+
+_OVERLAP_WINDOW = 64  # Batches of the recent acceptance rate used to project the remaining work
+
+
+def generate_overlap_bounded_cards(num_cards, max_overlap, seed=None, batch_size=1024,
+                                   max_candidates=None, allow_partial=False):
+    """
+    Generate cards such that any two of them share at most max_overlap numbers.
+
+    Candidates are drawn in batches of unique cards and screened against
+    the card x number incidence matrix of the accepted cards (one matrix
+    product per chunk of accepted cards, dropping a candidate at its first
+    conflicting chunk), then accepted greedily inside the batch.
+
+    Random greedy packing saturates: past some size almost every candidate
+    conflicts with an accepted card (at max_overlap=7, acceptance is ~0.1%
+    around 17k cards). The search is given max_candidates candidates
+    (default num_cards * 100) and stops early once the acceptance rate of
+    the last batches, which only falls as cards are added, projects that
+    the budget cannot be enough.
+
+    Args:
+        num_cards: Number of cards wanted
+        max_overlap: Maximum numbers shared by any pair (0-14)
+        seed: Optional seed for a reproducible run
+        max_candidates: Candidate budget (default: num_cards * 100)
+        allow_partial: Return the cards found so far instead of raising
+            when num_cards cannot be reached
+
+    Returns:
+        (M, 3, 7) uint8 card array; M == num_cards unless allow_partial
+
+    Raises:
+        ValueError: if max_overlap is out of range, or num_cards cannot be
+            reached within the budget and allow_partial is False
+    """
+    if not 0 <= max_overlap < NUMBERS_PER_CARD:
+        raise ValueError(f"max_overlap must be between 0 and {NUMBERS_PER_CARD - 1}")
+    max_candidates = num_cards * 100 if max_candidates is None else max_candidates
+
+    rng = np.random.default_rng(seed)
+    cards = np.zeros((num_cards, GRID_ROWS, GRID_COLS), dtype=np.uint8)
+    accepted_bits = np.zeros((num_cards, FINGERPRINT_BITS), dtype=np.float32)
+    accepted = 0
+    generated = 0
+    recent = []  # Cards accepted by each of the last _OVERLAP_WINDOW batches
+    rate = 0.0
+
+    while accepted < num_cards and generated < max_candidates:
+        batch = sample_unique_cards(batch_size, rng)
+        bits = fingerprint_bits(fingerprint_words(batch))
+        generated += batch_size
+
+        survivors = np.flatnonzero(within_overlap(bits, accepted_bits[:accepted], max_overlap))
+        bits = bits[survivors]
+        shared = bits @ bits.T
+
+        chosen = []
+        for i in range(len(survivors)):
+            if accepted + len(chosen) >= num_cards:
+                break
+            if not chosen or shared[i, chosen].max() <= max_overlap:
+                chosen.append(i)
+
+        cards[accepted:accepted + len(chosen)] = batch[survivors[chosen]]
+        accepted_bits[accepted:accepted + len(chosen)] = bits[chosen]
+        accepted += len(chosen)
+
+        recent = (recent + [len(chosen)])[-_OVERLAP_WINDOW:]
+        rate = sum(recent) / (len(recent) * batch_size)
+        if len(recent) == _OVERLAP_WINDOW and rate * (max_candidates - generated) < num_cards - accepted:
+            break
+
+    if accepted < num_cards and not allow_partial:
+        raise ValueError(
+            f"Only {accepted} of {num_cards} cards can share at most {max_overlap} numbers pairwise: "
+            f"after {generated} candidates the acceptance rate is {rate:.3%}, too low to reach "
+            f"{num_cards} within {max_candidates} candidates (ask for fewer cards or a larger max overlap)"
+        )
+    return cards[:accepted]
+
+
+# --- Streaming generation ---
+
+def stream_unique_cards(num_cards, chunk_size=65536, seed=None, false_positive_rate=1e-6):
+    """
+    Generate unique cards chunk by chunk with bounded memory.
+
+    Every chunk is unique by construction (sample_unique_cards); uniqueness
+    across chunks is enforced with a FingerprintBloomFilter sized for
+    num_cards, so memory does not grow with the number of chunks emitted.
+
+    Yields:
+        (M, 3, 7) uint8 card arrays, num_cards cards in total
+    """
+    rng = np.random.default_rng(seed)
+    seen = FingerprintBloomFilter(num_cards, false_positive_rate)
+    produced = 0
+    while produced < num_cards:
+        chunk = sample_unique_cards(min(chunk_size, num_cards - produced), rng)
+        chunk = chunk[seen.add_new(fingerprint_words(chunk))]
+        produced += len(chunk)
+        if len(chunk):
+            yield chunk
+
+
+# --- Random-access (counter-based) generation ---
+#
+# Card number n of a master seed is computed on its own, in O(1):
+# a keyed Feistel permutation of [0, TOTAL_NUMBER_SETS) maps n - 1 to a
+# number-set rank, and a keyed counter-based hash of n picks the layout.
+# Being a permutation, distinct card numbers always get distinct number sets.
+
+_FEISTEL_ROUNDS = 8
+_FEISTEL_HALF_BITS = (int(TOTAL_NUMBER_SETS - 1).bit_length() + 1) // 2
+_FEISTEL_HALF_MASK = np.uint64((1 << _FEISTEL_HALF_BITS) - 1)
+
+MAX_CARD_NUMBER = TOTAL_NUMBER_SETS
+
+
+def _counter_keys(seed):
+    """Feistel round keys and layout key derived from the master seed."""
+    state = np.random.SeedSequence(seed).generate_state(_FEISTEL_ROUNDS + 1, dtype=np.uint64)
+    return state[:_FEISTEL_ROUNDS], state[_FEISTEL_ROUNDS]
+
+
+def _feistel(values, round_keys):
+    half = np.uint64(_FEISTEL_HALF_BITS)
+    left, right = values >> half, values & _FEISTEL_HALF_MASK
+    for key in round_keys:
+        left, right = right, left ^ (mix64(right ^ key) & _FEISTEL_HALF_MASK)
+    return (left << half) | right
+
+
+def _permute_set_ranks(indices, round_keys):
+    """Keyed bijection of [0, TOTAL_NUMBER_SETS), by cycle walking the Feistel permutation."""
+    ranks = _feistel(indices, round_keys)
+    outside = ranks >= np.uint64(TOTAL_NUMBER_SETS)
+    while outside.any():
+        ranks[outside] = _feistel(ranks[outside], round_keys)
+        outside = ranks >= np.uint64(TOTAL_NUMBER_SETS)
+    return ranks.astype(np.int64)
+
+
+def materialize_cards(seed, card_numbers):
+    """
+    Compute the cards with the given numbers for a master seed.
+
+    Each card only depends on (seed, card_number), so any card can be
+    rebuilt without the archive. Cards with different numbers (1 to
+    MAX_CARD_NUMBER) never share the same set of numbers.
+
+    Args:
+        seed: Master seed (int)
+        card_numbers: Card numbers (1-based)
+
+    Returns:
+        (N, 3, 7) uint8 card array
+    """
+    card_numbers = np.asarray(card_numbers, dtype=np.int64).reshape(-1)
+    if len(card_numbers) and (card_numbers.min() < 1 or card_numbers.max() > MAX_CARD_NUMBER):
+        raise ValueError(f"Card numbers must be between 1 and {MAX_CARD_NUMBER}")
+
+    round_keys, layout_key = _counter_keys(seed)
+    set_ranks = _permute_set_ranks((card_numbers - 1).astype(np.uint64), round_keys)
+
+    groups = np.searchsorted(_SET_OFFSET, set_ranks, side="right") - 1
+    # 53 high bits of the keyed hash as a uniform number in [0, 1)
+    uniform = (mix64(card_numbers.astype(np.uint64) ^ layout_key) >> np.uint64(11)) / float(1 << 53)
+    layout_positions = (uniform * _GROUP_LAYOUT_COUNT[groups]).astype(np.int64)
+    return _build_cards(groups, set_ranks - _SET_OFFSET[groups], layout_positions)
@@ -0,0 +1,325 @@
+"""
+90-bit card fingerprints.
+
+A card's fingerprint has bit (n - 1) set for every number n on the card, so
+two cards have the same fingerprint exactly when they hold the same numbers,
+and the popcount of the AND of two fingerprints is the number of numbers
+they share.
+
+Single fingerprints are plain Python ints. Batches are (N, 2) uint64 arrays:
+word 0 holds numbers 1-64, word 1 holds numbers 65-90.
+"""
+import numpy as np
+
+FINGERPRINT_BITS = 90
+WORD_BITS = 64
+_LOW_MASK = (1 << WORD_BITS) - 1
+
+# Bit of every number 0-90 split over the two words (0 = empty cell, no bit)
+_NUMBER_BITS = np.zeros((FINGERPRINT_BITS + 1, 2), dtype=np.uint64)
+for _n in range(1, FINGERPRINT_BITS + 1):
+    _NUMBER_BITS[_n, (_n - 1) // WORD_BITS] = np.uint64(1 << ((_n - 1) % WORD_BITS))
+del _n
+
+if hasattr(np, "bitwise_count"):
+    def _word_popcount(words):
+        return np.bitwise_count(words)
+else:
+    # numpy < 2.0: count bits one byte at a time
+    _BYTE_POPCOUNT = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+
+    def _word_popcount(words):
+        as_bytes = np.ascontiguousarray(words).view(np.uint8).reshape(words.shape + (8,))
+        return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def card_fingerprint(card):
+    """
+    Fingerprint of a single JSON-form card (nested lists, None for empty cells).
+
+    Returns:
+        int: 90-bit mask of the card numbers
+    """
+    fingerprint = 0
+    for row in card:
+        for num in row:
+            if num is not None:
+                fingerprint |= 1 << (num - 1)
+    return fingerprint
+
+
+def fingerprint_words(cards):
+    """
+    Fingerprints of a (N, 3, 7) card array (0 = empty cell).
+
+    Returns:
+        (N, 2) uint64 array
+    """
+    cells = np.asarray(cards).reshape(len(cards), -1)
+    return np.stack([
+        np.bitwise_or.reduce(_NUMBER_BITS[cells, word], axis=1) for word in range(2)
+    ], axis=1)
+
+
+def fingerprints_from_ints(values):
+    """Pack Python-int fingerprints into a (N, 2) uint64 array."""
+    return np.array([(fp & _LOW_MASK, fp >> WORD_BITS) for fp in values], dtype=np.uint64).reshape(-1, 2)
+
+
+def fingerprint_to_int(words):
+    """Unpack one (2,) uint64 fingerprint into a Python int."""
+    return int(words[0]) | (int(words[1]) << WORD_BITS)
+
+
+def fingerprint_numbers(fingerprint):
+    """Sorted list of the numbers in a Python-int fingerprint."""
+    return [n for n in range(1, FINGERPRINT_BITS + 1) if fingerprint >> (n - 1) & 1]
+
+
+def fingerprint_texts(words):
+    """
+    Database form of fingerprints: the numbers sorted ascending, comma
+    separated ('5,10,12,...'), as computed by card_fingerprint() in SQL.
+
+    Returns:
+        list of str, one per row of a (N, 2) fingerprint array
+    """
+    bits = fingerprint_bits(words).astype(bool)
+    labels = np.array([str(n) for n in range(1, FINGERPRINT_BITS + 1)], dtype=object)
+    return [",".join(labels[row]) for row in bits]
+
+
+def fingerprints_from_texts(texts):
+    """
+    Parse database fingerprints ('5,10,12,...', None or '' for a card without
+    numbers) into a (N, 2) uint64 array.
+    """
+    texts = [text or "" for text in texts]
+    counts = np.array([text.count(",") + 1 if text else 0 for text in texts], dtype=np.int64)
+    numbers = np.fromstring(",".join(text for text in texts if text), dtype=np.int64, sep=",") \
+        if counts.sum() else np.zeros(0, dtype=np.int64)
+    rows = np.repeat(np.arange(len(texts)), counts)
+    keep = (numbers >= 1) & (numbers <= FINGERPRINT_BITS)
+
+    bits = np.zeros((len(texts), 16 * 8), dtype=bool)
+    bits[rows[keep], numbers[keep] - 1] = True
+    return np.packbits(bits, axis=1, bitorder="little").view(np.uint64)
+
+
+def popcount(words):
+    """Number of set bits (numbers) of every fingerprint in a (..., 2) array."""
+    return _word_popcount(words).sum(axis=-1, dtype=np.int64)
+
+
+def overlap_counts(a, b):
+    """
+    Count the numbers shared by fingerprints a and b (broadcasting).
+
+    Example:
+        overlap_counts(words, words[i]) -> shared numbers between card i and every card
+    """
+    return popcount(np.bitwise_and(a, b))
+
+
+# Structured view used to sort and search fingerprints as single values
+_KEY_DTYPE = np.dtype([("hi", np.uint64), ("lo", np.uint64)])
+
+
+def _as_keys(words):
+    return np.ascontiguousarray(words[:, ::-1]).view(_KEY_DTYPE).ravel()
+
+
+def _sorted_groups(words):
+    """Stable sort order of the fingerprints and a mask of where each distinct value starts."""
+    order = np.lexsort((words[:, 0], words[:, 1]))
+    ordered = words[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = np.any(ordered[1:] != ordered[:-1], axis=1)
+    return order, new_group
+
+
+def duplicate_groups(words):
+    """
+    Find cards sharing the same fingerprint.
+
+    Returns:
+        list of index arrays (ascending), one per fingerprint held by more than one card
+    """
+    order, new_group = _sorted_groups(words)
+    starts = np.flatnonzero(new_group)
+    sizes = np.diff(np.append(starts, len(order)))
+    return [np.sort(order[start:start + size]) for start, size in zip(starts, sizes) if size > 1]
+
+
+def first_occurrences(words):
+    """Indices (ascending) of the first card holding each distinct fingerprint."""
+    order, new_group = _sorted_groups(words)
+    # The sort is stable, so the first index of every group is its first occurrence
+    return np.sort(order[new_group])
+
+
+def match_fingerprints(words, reference):
+    """
+    Find every fingerprint of words in reference.
+
+    Returns:
+        (N,) int64 array: index of the first matching row of reference, -1 if none
+    """
+    words = np.asarray(words, dtype=np.uint64).reshape(-1, 2)
+    reference = np.asarray(reference, dtype=np.uint64).reshape(-1, 2)
+    # Sort both together: the sort is stable, so in every group of equal
+    # fingerprints the reference rows come first
+    order, new_group = _sorted_groups(np.concatenate([reference, words]))
+    group_first = order[np.flatnonzero(new_group)][np.cumsum(new_group) - 1]
+
+    match = np.empty(len(words), dtype=np.int64)
+    is_word = order >= len(reference)
+    found = group_first[is_word]
+    match[order[is_word] - len(reference)] = np.where(found < len(reference), found, -1)
+    return match
+
+
+class FingerprintSet:
+    """
+    Sorted, immutable set of fingerprints for fast membership tests.
+
+    Stores 16 bytes per fingerprint.
+    """
+
+    def __init__(self, words):
+        words = np.asarray(words, dtype=np.uint64).reshape(-1, 2)
+        order, new_group = _sorted_groups(words)
+        self._keys = _as_keys(words[order[new_group]])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, fingerprint):
+        if isinstance(fingerprint, int):
+            fingerprint = fingerprints_from_ints([fingerprint])
+        return bool(self.contains(fingerprint)[0])
+
+    def contains(self, words):
+        """Boolean mask telling which rows of a (N, 2) fingerprint array are in the set."""
+        keys = _as_keys(np.asarray(words, dtype=np.uint64).reshape(-1, 2))
+        if len(self._keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        idx = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return self._keys[idx] == keys
+
+
+def fingerprint_bits(words):
+    """
+    Expand fingerprints into a (N, 90) card x number incidence matrix.
+
+    Overlaps of whole batches are then a single matrix product:
+    fingerprint_bits(a) @ fingerprint_bits(b).T
+    """
+    as_bytes = np.ascontiguousarray(words, dtype=np.uint64).view(np.uint8).reshape(len(words), 16)
+    return np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :FINGERPRINT_BITS].astype(np.float32)
+
+
+def within_overlap(candidate_bits, bits, max_overlap, chunk_size=4096):
+    """
+    Tell which candidates share at most max_overlap numbers with every card of a batch.
+
+    Candidates are dropped as soon as one chunk of the batch rejects them,
+    so rejected candidates only cost the chunks up to the first conflict.
+
+    Args:
+        candidate_bits: (B, 90) incidence matrix from fingerprint_bits()
+        bits: (N, 90) incidence matrix to compare against
+        max_overlap: Largest allowed number of shared numbers
+
+    Returns:
+        (B,) bool mask
+    """
+    alive = np.arange(len(candidate_bits))
+    for start in range(0, len(bits), chunk_size):
+        if len(alive) == 0:
+            break
+        shared = candidate_bits[alive] @ bits[start:start + chunk_size].T
+        alive = alive[shared.max(axis=1) <= max_overlap]
+    ok = np.zeros(len(candidate_bits), dtype=bool)
+    ok[alive] = True
+    return ok
+
+
+def overlap_histogram(words, chunk_size=2048):
+    """
+    Histogram of the pairwise overlaps of a set of fingerprints.
+
+    Every unordered pair of distinct cards is counted once.
+
+    Returns:
+        (FINGERPRINT_BITS + 1,) int64 array: histogram[k] = number of pairs sharing k numbers
+    """
+    bits = fingerprint_bits(words)
+    histogram = np.zeros(FINGERPRINT_BITS + 1, dtype=np.int64)
+    for start in range(0, len(words), chunk_size):
+        stop = min(start + chunk_size, len(words))
+        # Pairs inside the block (upper triangle), then block x every later card
+        inner = (bits[start:stop] @ bits[start:stop].T).astype(np.uint8)
+        histogram += np.bincount(inner[np.triu_indices(stop - start, k=1)], minlength=FINGERPRINT_BITS + 1)
+        outer = (bits[start:stop] @ bits[stop:].T).astype(np.uint8)
+        histogram += np.bincount(outer.ravel(), minlength=FINGERPRINT_BITS + 1)
+    return histogram
+
+
+def mix64(x):
+    """splitmix64 finalizer: keyed-hash building block on uint64 arrays (wrapping arithmetic)."""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+class FingerprintBloomFilter:
+    """
+    Fixed-size probabilistic set of fingerprints for bounded-memory dedup.
+
+    Memory is fixed at construction (about 29 bits per expected card at a
+    1e-6 false positive rate) no matter how many cards stream through.
+    A false positive only means a new card is wrongly treated as already
+    seen, never that a duplicate slips through.
+    """
+
+    def __init__(self, capacity, false_positive_rate=1e-6):
+        capacity = max(1, capacity)
+        self.num_bits = int(np.ceil(-capacity * np.log(false_positive_rate) / np.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * np.log(2))))
+        self._bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, words):
+        # Double hashing: position_i = h1 + i * h2 (mod num_bits)
+        words = np.asarray(words, dtype=np.uint64).reshape(-1, 2)
+        h1 = mix64(words[:, 0] ^ mix64(words[:, 1]))
+        h2 = mix64(h1) | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def contains(self, words):
+        """Boolean mask: True where the fingerprint was (probably) added before."""
+        positions = self._positions(words)
+        hits = self._bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8) & 1
+        return hits.all(axis=1)
+
+    def add(self, words):
+        positions = self._positions(words).ravel()
+        np.bitwise_or.at(self._bits, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+    def add_new(self, words):
+        """
+        Add a batch and report which fingerprints were not seen before.
+
+        Duplicates inside the batch only count once (the first occurrence).
+
+        Returns:
+            (N,) bool mask of new fingerprints
+        """
+        words = np.asarray(words, dtype=np.uint64).reshape(-1, 2)
+        new = np.zeros(len(words), dtype=bool)
+        new[first_occurrences(words)] = True
+        new &= ~self.contains(words)
+        self.add(words[new])
+        return new
@@ -0,0 +1,316 @@
+"""
+QR code rendering for cards, spread over worker processes.
+
+All card URLs have the shape {base_url}?card_id={id}, so for a given id
+length they share the QR version, error-correction level and mask.
+QRTemplate fixes those once and precomputes the function patterns (finder,
+timing, alignment and format modules) and the position and mask bit of
+every data module; a card then only costs its Reed-Solomon codewords and
+one vectorized placement, instead of the version fitting, 8 trial masks and
+full matrix build of qrcode.make().
+
+Codes can be written as PNG (same look as qrcode.make: 10 px modules, 4
+module border), as compact SVG, or as raw module matrices in one .npz file
+(about 50 bytes per card).
+
+Rendering is CPU-bound, so card ids are split into chunks and rendered by a
+process pool; every worker writes its files directly. Small jobs are
+rendered in-process, where the pool start-up would cost more than it saves.
+"""
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+import qrcode
+from PIL import Image
+from qrcode import util
+
+# --- CONFIGURATION ---
+QR_CHUNK_SIZE = 256  # Card ids per task sent to a worker
+QR_MIN_PARALLEL = 1024  # Below this many codes, render in-process
+QR_FORMATS = ("png", "svg", "matrix")
+QR_BOX_SIZE = 10  # Pixels per module in PNG files
+QR_BORDER = 4  # Quiet zone in modules
+MATRIX_FILE = "qr_modules.npz"
+PNG_COMPRESS_LEVEL = 6
+
+
+def card_url(base_url, card_id):
+    return f"{base_url}?card_id={card_id}"
+
+
+class QRTemplate:
+    """
+    QR code layout shared by every card URL with ids of up to `digits` digits.
+
+    Attributes:
+        version: QR version (size = 4 * version + 17 modules)
+        size: Modules per side, without border
+        mask_pattern: Mask used for every code (0-7)
+    """
+
+    def __init__(self, base_url, digits, error_correction=qrcode.constants.ERROR_CORRECT_M, mask_pattern=None):
+        self.base_url = base_url
+        self.digits = digits
+        self.error_correction = error_correction
+
+        # Version and mask chosen once, on the longest URL of the class
+        longest = card_url(base_url, "9" * digits)
+        qr = qrcode.QRCode(error_correction=error_correction)
+        qr.add_data(longest)
+        qr.make(fit=True)
+        self.version = qr.version
+        self.mask_pattern = qr.best_mask_pattern() if mask_pattern is None else mask_pattern
+
+        # Function patterns only: data placement is done by modules()
+        blank = qrcode.QRCode(version=self.version, error_correction=error_correction,
+                              mask_pattern=self.mask_pattern)
+        blank.add_data(longest)
+        blank.map_data = lambda data, mask_pattern: None
+        blank.makeImpl(False, self.mask_pattern)
+        self.size = blank.modules_count
+
+        cells = np.array([[cell is None for cell in row] for row in blank.modules])
+        self._function_modules = np.array([[bool(cell) for cell in row] for row in blank.modules])
+        self._positions = self._data_positions(cells)
+        mask = util.mask_func(self.mask_pattern)
+        rows, cols = np.divmod(self._positions, self.size)
+        self._mask_bits = np.array([mask(r, c) for r, c in zip(rows.tolist(), cols.tolist())], dtype=bool)
+        self._tables = {}
+
+    def _data_positions(self, free):
+        """Flat indices of the data modules in placement order (QR zigzag, as qrcode's map_data)."""
+        positions = []
+        row, step = self.size - 1, -1
+        for col in range(self.size - 1, 0, -2):
+            if col <= 6:
+                col -= 1
+            while 0 <= row < self.size:
+                for c in (col, col - 1):
+                    if free[row, c]:
+                        positions.append(row * self.size + c)
+                row += step
+            row -= step
+            step = -step
+        return np.array(positions, dtype=np.int64)
+
+    def _url_codewords(self, url):
+        data = util.QRData(url.encode('utf-8'), mode=util.MODE_8BIT_BYTE)
+        return np.array(util.create_data(self.version, self.error_correction, [data]), dtype=np.uint8)
+
+    def _digit_tables(self, length):
+        """
+        Codewords of the URL with id '00...0' (length digits), and the XOR
+        change caused by each digit value at each position.
+
+        Encoding and Reed-Solomon are linear over XOR, and URLs with ids of
+        the same length only differ in those digits, so the codewords of any
+        id are the base XORed with one table row per digit.
+        """
+        if length in self._tables:
+            return self._tables[length]
+        base = self._url_codewords(card_url(self.base_url, "0" * length))
+        deltas = np.zeros((length, 10, len(base)), dtype=np.uint8)
+        for position in range(length):
+            for digit in range(1, 10):
+                digits = "0" * position + str(digit) + "0" * (length - position - 1)
+                deltas[position, digit] = self._url_codewords(card_url(self.base_url, digits)) ^ base
+        self._tables[length] = base, deltas
+        return base, deltas
+
+    def codewords(self, card_ids):
+        """
+        Data and error-correction codewords of the card URLs.
+
+        Returns:
+            (N, codewords) uint8 array
+        """
+        texts = np.array([str(card_id) for card_id in card_ids])
+        lengths = np.char.str_len(texts) if len(texts) else np.zeros(0, dtype=int)
+        if len(texts) and lengths.max() > self.digits:
+            raise ValueError(f"Card id {texts[lengths.argmax()]} is longer than {self.digits} digits")
+
+        result = None
+        for length in np.unique(lengths).tolist():
+            base, deltas = self._digit_tables(length)
+            if result is None:
+                result = np.empty((len(texts), len(base)), dtype=np.uint8)
+            rows = np.flatnonzero(lengths == length)
+            digits = texts[rows].astype(f"S{length}").view(np.uint8).reshape(len(rows), length) - ord("0")
+            result[rows] = np.bitwise_xor.reduce(deltas[np.arange(length), digits], axis=1) ^ base
+        return result
+
+    def modules(self, card_ids):
+        """
+        Module matrices of several cards.
+
+        Returns:
+            (N, size, size) bool array, True for dark modules
+        """
+        card_ids = list(card_ids)
+        bits = np.zeros((len(card_ids), len(self._positions)), dtype=bool)
+        if card_ids:
+            data_bits = np.unpackbits(self.codewords(card_ids), axis=1).astype(bool)
+            bits[:, :data_bits.shape[1]] = data_bits  # Remainder bits stay 0
+
+        matrices = np.broadcast_to(self._function_modules.ravel(), (len(card_ids), self.size ** 2)).copy()
+        matrices[:, self._positions] = bits ^ self._mask_bits
+        return matrices.reshape(len(card_ids), self.size, self.size)
+
+    def svg(self, modules, border=QR_BORDER):
+        """
+        Compact SVG of one module matrix, 1 unit per module: every horizontal
+        run of dark modules is a 1-unit-wide stroke, drawn with relative moves.
+        """
+        width = self.size + 2 * border
+        padded = np.zeros((self.size, self.size + 2), dtype=np.int8)
+        padded[:, 1:-1] = modules
+        edges = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+
+        path, x, y = [], 0, 0
+        for row, start, run in zip((rows + border).tolist(), (starts + border).tolist(), (ends - starts).tolist()):
+            path.append(f"m{start - x} {row - y}h{run}")
+            x, y = start + run, row
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {width}">'
+                f'<rect width="{width}" height="{width}" fill="#fff"/>'
+                f'<path d="M0 .5{"".join(path)}" stroke="#000"/></svg>')
+
+    def png(self, modules, box_size=QR_BOX_SIZE, border=QR_BORDER):
+        """
+        1-bit grayscale PNG of one module matrix, encoded directly: every
+        module row becomes box_size identical scanlines, which deflate
+        compresses to almost nothing.
+        """
+        pixels = np.pad(~modules, border, constant_values=True).repeat(box_size, axis=1)
+        scanlines = np.packbits(pixels, axis=1)
+        raw = np.concatenate([np.zeros((len(scanlines), 1), dtype=np.uint8), scanlines], axis=1)  # Filter: none
+        raw = raw.repeat(box_size, axis=0)
+        header = struct.pack(">IIBBBBB", pixels.shape[1], len(raw), 1, 0, 0, 0, 0)
+        return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header) +
+                _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), PNG_COMPRESS_LEVEL)) + _png_chunk(b"IEND", b""))
+
+    def image(self, modules, box_size=QR_BOX_SIZE, border=QR_BORDER):
+        """1-bit PIL image of one module matrix (black modules on white)."""
+        padded = np.pad(~modules, border, constant_values=True)
+        return Image.fromarray(padded.repeat(box_size, axis=0).repeat(box_size, axis=1))
+
+
+def _png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+@lru_cache(maxsize=8)
+def qr_template(base_url, digits):
+    """QRTemplate for base_url and ids of up to `digits` digits (built once per process)."""
+    return QRTemplate(base_url, digits)
+
+
+def qr_filename(output_dir, card_id, fmt="png"):
+    return os.path.join(output_dir, f"qr_card_{card_id}.{fmt}")
+
+
+def _render_chunk(base_url, digits, output_dir, card_ids, fmt="png"):
+    """
+    Render and save the QR codes of a chunk of card ids.
+
+    Returns:
+        tuple: (number rendered, list of (card_id, error message))
+    """
+    template = qr_template(base_url, digits)
+    try:
+        modules = template.modules(card_ids)
+    except ValueError as e:
+        return 0, [(card_id, str(e)) for card_id in card_ids]
+
+    rendered, errors = 0, []
+    for card_id, card_modules in zip(card_ids, modules):
+        try:
+            if fmt == "svg":
+                with open(qr_filename(output_dir, card_id, "svg"), 'w', encoding='utf-8') as f:
+                    f.write(template.svg(card_modules))
+            else:
+                with open(qr_filename(output_dir, card_id), 'wb') as f:
+                    f.write(template.png(card_modules))
+            rendered += 1
+        except Exception as e:
+            errors.append((card_id, str(e)))
+    return rendered, errors
+
+
+def write_qr_matrices(card_ids, base_url, path):
+    """
+    Save the module matrices of many cards in one .npz file: card_ids,
+    modules (bit-packed rows of size * size bits), size, version, base_url.
+    """
+    card_ids = list(card_ids)
+    template = qr_template(base_url, max(len(str(card_id)) for card_id in card_ids))
+    modules = template.modules(card_ids)
+    np.savez_compressed(
+        path, card_ids=np.array(card_ids, dtype=np.int64),
+        modules=np.packbits(modules.reshape(len(card_ids), -1), axis=1),
+        size=template.size, version=template.version, base_url=base_url
+    )
+
+
+def render_qr_codes(card_ids, base_url, output_dir, workers=None, chunk_size=QR_CHUNK_SIZE,
+                    progress=None, fmt="png"):
+    """
+    Render qr_card_<id>.<fmt> for every card id, in parallel.
+
+    Args:
+        card_ids: Database ids of the cards
+        base_url: App URL; codes point to {base_url}?card_id={id}
+        output_dir: Directory for the files (created if missing)
+        workers: Worker processes (default: one per CPU; 1 = in-process)
+        chunk_size: Card ids per task
+        progress: Optional callback(rendered so far, total)
+        fmt: "png", "svg", or "matrix" (all cards in one qr_modules.npz)
+
+    Returns:
+        dict: rendered, errors (list of (card_id, message)), seconds, workers
+    """
+    if fmt not in QR_FORMATS:
+        raise ValueError(f"Unknown QR format {fmt!r} (expected one of {', '.join(QR_FORMATS)})")
+    os.makedirs(output_dir, exist_ok=True)
+    card_ids = list(card_ids)
+    start = time.perf_counter()
+
+    if fmt == "matrix":
+        if card_ids:
+            write_qr_matrices(card_ids, base_url, os.path.join(output_dir, MATRIX_FILE))
+        if progress:
+            progress(len(card_ids), len(card_ids))
+        return {"rendered": len(card_ids), "errors": [], "seconds": time.perf_counter() - start, "workers": 1}
+
+    # Every chunk uses the same template, whatever ids it holds
+    digits = max((len(str(card_id)) for card_id in card_ids), default=1)
+    chunks = [card_ids[i:i + chunk_size] for i in range(0, len(card_ids), chunk_size)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    if len(card_ids) < QR_MIN_PARALLEL:
+        workers = 1
+
+    rendered, errors = 0, []
+    if workers == 1:
+        for chunk in chunks:
+            count, chunk_errors = _render_chunk(base_url, digits, output_dir, chunk, fmt)
+            rendered += count
+            errors += chunk_errors
+            if progress:
+                progress(rendered, len(card_ids))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_chunk, base_url, digits, output_dir, chunk, fmt) for chunk in chunks]
+            for future in as_completed(futures):
+                count, chunk_errors = future.result()
+                rendered += count
+                errors += chunk_errors
+                if progress:
+                    progress(rendered, len(card_ids))
+
+    return {"rendered": rendered, "errors": errors, "seconds": time.perf_counter() - start, "workers": workers}
@@ -0,0 +1,510 @@
+"""
+Streaming card files.
+
+Two formats, both written chunk by chunk and flushed after every chunk so
+later stages can start reading before generation ends:
+
+- NDJSON: one {"card_number": n, "numbers": [[...], ...]} object per line,
+  same card objects as all_cards.json.
+- Binary: a 32-byte header followed by fixed-width 21-byte records (the
+  3x7 cells as uint8, 0 = empty), record i holding card number
+  first_card_number + i. The header card count and "complete" flag are
+  only filled in when the writer closes the file.
+
+Binary files are also the compact archive format: CardArchive memory-maps
+them, so reading cards #201-#350 of a million only touches the pages
+holding those records. Archives whose card numbers are not a contiguous
+run carry a card-number index (one int64 per record) after the records.
+json_to_binary() and binary_to_json() convert from and to all_cards.json.
+
+all_cards.json itself can be read incrementally: iter_json_cards() decodes
+one card object at a time and select_json_cards() stops reading as soon as
+the requested card-number ranges are passed, without decoding the cards
+outside the ranges.
+"""
+import json
+import os
+import re
+import struct
+import time
+
+import numpy as np
+
+from card_engine import GRID_ROWS, GRID_COLS, cards_from_lists, cards_to_lists
+
+BINARY_MAGIC = b"TMBC"
+BINARY_VERSION = 1
+RECORD_SIZE = GRID_ROWS * GRID_COLS
+# magic, version, record size, flags, first card number, card count, series size (0 = none)
+_HEADER = struct.Struct("<4sHHIQQI")
+HEADER_SIZE = _HEADER.size
+FLAG_COMPLETE = 1
+FLAG_CARD_INDEX = 2
+
+_NDJSON_CELLS = ["null"] + [str(n) for n in range(1, 256)]
+
+
+def card_file_format(path):
+    """'ndjson' or 'binary', from the file extension (.ndjson/.jsonl or .bin)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext == ".bin":
+        return "binary"
+    raise ValueError(f"Unknown card file extension '{ext}' (expected .ndjson, .jsonl or .bin)")
+
+
+def write_ndjson(path, chunks, first_card_number=1):
+    """
+    Stream card chunks to an NDJSON file.
+
+    Args:
+        path: Output file
+        chunks: Iterable of (M, 3, 7) card arrays
+        first_card_number: Number of the first card written
+
+    Returns:
+        int: number of cards written
+    """
+    card_number = first_card_number
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            # Same output as json.dumps(..., separators=(",", ":")), without the per-card overhead
+            lines = [
+                '{"card_number":%d,"numbers":[%s]}' % (
+                    card_number + i,
+                    ",".join("[" + ",".join(_NDJSON_CELLS[num] for num in row) + "]" for row in card)
+                )
+                for i, card in enumerate(np.asarray(chunk).tolist())
+            ]
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            card_number += len(chunk)
+    return card_number - first_card_number
+
+
+def iter_ndjson(path):
+    """Yield card dicts ({'card_number', 'numbers'}) from an NDJSON file, one line at a time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _pack_header(flags, first_card_number, card_count, series_size):
+    return _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, RECORD_SIZE, flags,
+                        first_card_number, card_count, series_size)
+
+
+def write_binary(path, chunks, first_card_number=1, series_size=0):
+    """
+    Stream card chunks to a binary card file.
+
+    Args:
+        path: Output file
+        chunks: Iterable of (M, 3, 7) card arrays
+        first_card_number: Number of the first card written
+        series_size: Cards per series (0 if the cards are not grouped in series)
+
+    Returns:
+        int: number of cards written
+    """
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(_pack_header(0, first_card_number, 0, series_size))
+        f.flush()
+        for chunk in chunks:
+            f.write(np.ascontiguousarray(chunk, dtype=np.uint8).tobytes())
+            f.flush()
+            count += len(chunk)
+        f.seek(0)
+        f.write(_pack_header(FLAG_COMPLETE, first_card_number, count, series_size))
+    return count
+
+
+def _read_header(f):
+    header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError("Truncated card file header")
+    magic, version, record_size, flags, first_card_number, card_count, series_size = _HEADER.unpack(header)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a binary card file")
+    if version != BINARY_VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"Unsupported card file version {version} (record size {record_size})")
+    return first_card_number, card_count, flags, series_size
+
+
+def read_binary_header(f):
+    """
+    Read and check the header of an open binary card file.
+
+    Returns:
+        tuple: (first_card_number, card_count, complete) - card_count is only
+        meaningful once complete is True
+    """
+    first_card_number, card_count, flags, _ = _read_header(f)
+    return first_card_number, card_count, bool(flags & FLAG_COMPLETE)
+
+
+def is_card_archive(path):
+    """True if path is a binary card file (checked by its magic bytes, not its extension)."""
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def iter_binary(path, chunk_size=65536, follow=False, poll_interval=0.2):
+    """
+    Yield (first_card_number, cards) chunks from a binary card file.
+
+    With follow=True the reader keeps waiting for new records until the
+    writer marks the file complete, so it can run alongside the generator.
+    Archives with a card-number index are read with CardArchive instead.
+    """
+    with open(path, 'rb') as f:
+        first_card_number, card_count, flags, _ = _read_header(f)
+        if flags & FLAG_CARD_INDEX:
+            raise ValueError(f"{path} has non-contiguous card numbers, open it with CardArchive")
+        complete = bool(flags & FLAG_COMPLETE)
+        done = 0
+        while True:
+            records = min(chunk_size, card_count - done) if complete else chunk_size
+            data = f.read(records * RECORD_SIZE)
+            usable = len(data) - len(data) % RECORD_SIZE
+            if usable:
+                cards = np.frombuffer(data[:usable], dtype=np.uint8).reshape(-1, GRID_ROWS, GRID_COLS)
+                yield first_card_number + done, cards
+                done += len(cards)
+            # Put back a partially written record for the next read
+            f.seek(usable - len(data), os.SEEK_CUR)
+            if usable:
+                continue
+
+            if (complete and done >= card_count) or not follow:
+                return
+            time.sleep(poll_interval)
+            f.seek(0)
+            _, card_count, complete = read_binary_header(f)
+            f.seek(HEADER_SIZE + done * RECORD_SIZE)
+
+
+def write_card_stream(path, chunks, first_card_number=1):
+    """Write card chunks to path in the format given by its extension."""
+    if card_file_format(path) == "ndjson":
+        return write_ndjson(path, chunks, first_card_number)
+    return write_binary(path, chunks, first_card_number)
+
+
+def write_card_archive(path, card_numbers, cards, series_size=0):
+    """
+    Write cards with arbitrary card numbers to a binary card file.
+
+    Contiguous card numbers give a plain binary file; any other numbering
+    adds the card-number index after the records.
+
+    Args:
+        path: Output file
+        card_numbers: (N,) card numbers, in record order
+        cards: (N, 3, 7) card array
+        series_size: Cards per series (0 if the cards are not grouped in series)
+
+    Returns:
+        int: number of cards written
+    """
+    card_numbers = np.asarray(card_numbers, dtype=np.int64)
+    if len(card_numbers) != len(cards):
+        raise ValueError(f"{len(card_numbers)} card numbers for {len(cards)} cards")
+    if len(card_numbers) and np.any(card_numbers < 0):
+        raise ValueError("Card numbers must not be negative")
+
+    first_card_number = int(card_numbers[0]) if len(card_numbers) else 1
+    if np.all(np.diff(card_numbers) == 1):
+        return write_binary(path, [cards], first_card_number, series_size)
+
+    with open(path, 'wb') as f:
+        f.write(_pack_header(0, first_card_number, 0, series_size))
+        f.write(np.ascontiguousarray(cards, dtype=np.uint8).tobytes())
+        f.write(card_numbers.astype("<i8").tobytes())
+        f.seek(0)
+        f.write(_pack_header(FLAG_COMPLETE | FLAG_CARD_INDEX, first_card_number, len(cards), series_size))
+    return len(cards)
+
+
+class CardArchive:
+    """
+    Memory-mapped, read-only view of a binary card file.
+
+    Usage:
+        with CardArchive("all_cards.bin") as archive:
+            card_numbers, cards = archive.select(201, 350)
+
+    cards is a (N, 3, 7) uint8 np.memmap; nothing is read from disk until
+    records are actually used. A file still being written is opened with
+    the records complete so far.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.first_card_number, count, flags, self.series_size = _read_header(f)
+        if not flags & FLAG_COMPLETE:
+            count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE
+
+        # np.memmap cannot map an empty region
+        if count:
+            self.cards = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_SIZE,
+                                   shape=(count, GRID_ROWS, GRID_COLS))
+        else:
+            self.cards = np.zeros((0, GRID_ROWS, GRID_COLS), dtype=np.uint8)
+
+        self._index = None
+        if flags & FLAG_CARD_INDEX and count:
+            self._index = np.memmap(path, dtype="<i8", mode='r',
+                                    offset=HEADER_SIZE + count * RECORD_SIZE, shape=(count,))
+            self._index_sorted = bool(np.all(self._index[1:] > self._index[:-1]))
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory maps."""
+        for mapped in (self.cards, self._index):
+            if isinstance(mapped, np.memmap):
+                mapped._mmap.close()
+        self.cards = np.zeros((0, GRID_ROWS, GRID_COLS), dtype=np.uint8)
+        self._index = None
+
+    @property
+    def card_numbers(self):
+        """(N,) int64 card number of every record."""
+        if self._index is not None:
+            return np.asarray(self._index, dtype=np.int64)
+        return np.arange(self.first_card_number, self.first_card_number + len(self), dtype=np.int64)
+
+    def positions(self, start=None, end=None):
+        """
+        Record positions of the cards numbered start..end (inclusive, None = open).
+
+        Returns:
+            slice for contiguous archives and sorted indexes, else an index array
+        """
+        if self._index is None:
+            first = 0 if start is None else min(max(start - self.first_card_number, 0), len(self))
+            stop = len(self) if end is None else min(max(end - self.first_card_number + 1, first), len(self))
+            return slice(first, stop)
+        if self._index_sorted:
+            first = 0 if start is None else int(np.searchsorted(self._index, start, side='left'))
+            stop = len(self) if end is None else int(np.searchsorted(self._index, end, side='right'))
+            return slice(first, max(first, stop))
+        keep = np.ones(len(self), dtype=bool)
+        if start is not None:
+            keep &= self._index >= start
+        if end is not None:
+            keep &= self._index <= end
+        return np.flatnonzero(keep)
+
+    def select(self, start=None, end=None):
+        """
+        Cards numbered start..end (inclusive).
+
+        Returns:
+            tuple: (card_numbers, cards) - (M,) int64 and (M, 3, 7) uint8
+        """
+        where = self.positions(start, end)
+        return self.card_numbers[where], self.cards[where]
+
+    def card(self, card_number):
+        """(3, 7) array of one card; KeyError if the archive does not hold it."""
+        card_numbers, cards = self.select(card_number, card_number)
+        if len(cards) == 0:
+            raise KeyError(f"Card #{card_number} not in {self.path}")
+        return np.array(cards[0])
+
+    def card_dicts(self, start=None, end=None):
+        """
+        Cards numbered start..end as all_cards.json card objects
+        ({'card_number', 'numbers'}, plus 'series' for series archives).
+        """
+        where = self.positions(start, end)
+        card_numbers = self.card_numbers[where].tolist()
+        numbers = cards_to_lists(np.array(self.cards[where]))
+        dicts = [{"card_number": n, "numbers": card} for n, card in zip(card_numbers, numbers)]
+        if self.series_size:
+            positions = np.arange(len(self))[where]
+            for card_data, pos in zip(dicts, positions.tolist()):
+                card_data["series"] = pos // self.series_size + 1
+        return dicts
+
+
+def _series_size(card_dicts):
+    """Cards per series of all_cards.json card objects (0 if they carry no series)."""
+    if not card_dicts or "series" not in card_dicts[0]:
+        return 0
+    series = np.array([card_data["series"] for card_data in card_dicts])
+    size = int(np.count_nonzero(series == series[0]))
+    if np.any(series != np.arange(len(series)) // size + 1):
+        raise ValueError("Series numbers are not consecutive blocks of equal size")
+    return size
+
+
+def json_to_binary(json_path, binary_path):
+    """
+    Convert an all_cards.json file to a binary card archive.
+
+    Returns:
+        int: number of cards written
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        card_dicts = json.load(f)["cards"]
+    card_numbers = [card_data["card_number"] for card_data in card_dicts]
+    cards = cards_from_lists([card_data["numbers"] for card_data in card_dicts])
+    return write_card_archive(binary_path, card_numbers, cards, _series_size(card_dicts))
+
+
+def binary_to_json(binary_path, json_path):
+    """
+    Convert a binary card archive to the all_cards.json format.
+
+    Returns:
+        int: number of cards written
+    """
+    with CardArchive(binary_path) as archive:
+        card_dicts = archive.card_dicts()
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"total_cards": len(card_dicts), "cards": card_dicts}, f, indent=2, ensure_ascii=False)
+    return len(card_dicts)
+
+
+_CARDS_KEY = re.compile(r'"cards"\s*:\s*\[')
+_SEPARATOR = re.compile(r'[\s,]*')
+# A card_number key whose value is complete (not cut by the end of the buffer)
+_CARD_NUMBER = re.compile(r'"card_number"\s*:\s*(\d+)(?=\D)')
+
+
+def iter_json_cards(path, chunk_size=1 << 20):
+    """
+    Yield the card objects of an all_cards.json file one at a time.
+
+    The file is read in chunk_size pieces, so memory stays bounded by the
+    chunk size no matter how many cards the file holds.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        match = None
+        while match is None:
+            data = f.read(chunk_size)
+            if not data:
+                raise ValueError(f"No 'cards' array in {path}")
+            # Keep a tail in case the key is split between two chunks
+            buffer = buffer[-16:] + data
+            match = _CARDS_KEY.search(buffer)
+        pos = match.end()
+        eof = False
+
+        while True:
+            pos = _SEPARATOR.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos == len(buffer) and eof:
+                raise ValueError(f"Unterminated 'cards' array in {path}")
+            end = None
+            try:
+                card_data, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if end is None or (end == len(buffer) and not eof):
+                # Card object cut by the chunk boundary: read on and decode it again
+                data = f.read(chunk_size)
+                eof = not data
+                buffer = buffer[pos:] + data
+                pos = 0
+                continue
+            yield card_data
+            pos = end
+
+
+def parse_card_ranges(text):
+    """
+    Parse card ranges like '201-350,1000-1099,2000' into [(201, 350), (1000, 1099), (2000, 2000)].
+    """
+    ranges = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        start, end = int(start), int(end or start)
+        if start > end:
+            raise ValueError(f"Empty card range '{part.strip()}'")
+        ranges.append((start, end))
+    return ranges
+
+
+def merge_card_ranges(ranges):
+    """Sort inclusive (start, end) ranges and merge the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def select_json_cards(path, ranges, chunk_size=1 << 20):
+    """
+    Read only the cards whose card_number falls in one of the ranges.
+
+    Cards outside the ranges are skipped by scanning for their card_number
+    key, without decoding them. Cards in all_cards.json are stored by
+    ascending card_number, so reading stops at the first card past the
+    last range.
+
+    Args:
+        path: all_cards.json file
+        ranges: List of inclusive (start, end) card-number ranges
+
+    Returns:
+        list of card objects in file order
+    """
+    ranges = merge_card_ranges(ranges)
+    last = ranges[-1][1]
+    decoder = json.JSONDecoder()
+    selected = []
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        pos = 0
+        while True:
+            match = _CARD_NUMBER.search(buffer, pos)
+            if match is not None:
+                card_number = int(match.group(1))
+                if card_number > last:
+                    break
+                if not any(start <= card_number <= end for start, end in ranges):
+                    pos = match.end()
+                    continue
+                # Card objects hold no nested objects: the nearest "{" opens this card
+                start = buffer.rfind("{", pos, match.start())
+                try:
+                    card_data, pos = decoder.raw_decode(buffer, start)
+                    selected.append(card_data)
+                    continue
+                except json.JSONDecodeError:
+                    cut = start
+            else:
+                found = buffer.rfind("{", pos)
+                cut = found if found >= 0 else len(buffer)
+
+            # Current card cut by the chunk boundary: keep it and read on
+            data = f.read(chunk_size)
+            if not data:
+                if match is not None:
+                    raise ValueError(f"Truncated card #{card_number} in {path}")
+                break
+            buffer = buffer[cut:] + data
+            pos = 0
+    return selected
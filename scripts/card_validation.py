@@ -0,0 +1,136 @@
+"""
+Vectorized Tombola card validation.
+
+validate_cards() checks a whole (N, 3, 7) card array in one pass and returns
+a boolean mask plus a per-card error code. Error codes are bit flags, so a
+card breaking several rules reports all of them; describe_errors() turns a
+code into readable messages.
+"""
+import numpy as np
+
+from card_engine import GRID_ROWS, GRID_COLS, NUMBERS_PER_ROW, COL_RANGES
+
+ERR_ROW_COUNT = 1 << 0       # a row does not hold exactly 5 numbers
+ERR_COLUMN_RANGE = 1 << 1    # a number sits outside its column range
+ERR_VERTICAL_SORT = 1 << 2   # a column is not sorted top to bottom
+ERR_DUPLICATE = 1 << 3       # the same number appears twice on the card
+ERR_NUMBER_RANGE = 1 << 4    # a number is outside 1-90
+ERR_SHAPE = 1 << 5           # the card is not a 3x7 matrix (list input only)
+
+ERROR_MESSAGES = {
+    ERR_ROW_COUNT: "row without exactly 5 numbers",
+    ERR_COLUMN_RANGE: "number outside its column range",
+    ERR_VERTICAL_SORT: "column not sorted ascending",
+    ERR_DUPLICATE: "duplicate numbers",
+    ERR_NUMBER_RANGE: "number outside valid range (1-90)",
+    ERR_SHAPE: f"not a {GRID_ROWS}x{GRID_COLS} matrix",
+}
+
+_COL_MIN = np.array([lo for lo, _ in COL_RANGES])
+_COL_MAX = np.array([hi for _, hi in COL_RANGES])
+
+
+def validate_cards(cards):
+    """
+    Validate a batch of cards against every Tombola rule.
+
+    Args:
+        cards: (N, 3, 7) integer array, 0 for empty cells
+
+    Returns:
+        tuple: (valid, codes) - (N,) bool mask and (N,) uint8 error codes (0 = valid)
+    """
+    cards = np.asarray(cards)
+    if cards.dtype != np.uint8:
+        cards = np.clip(cards, -1000, 1000)  # keep int16 arithmetic safe
+    cards = cards.astype(np.int16)
+    filled = cards != 0
+    codes = np.zeros(len(cards), dtype=np.uint8)
+
+    row_counts = filled.sum(axis=2)
+    codes[np.any(row_counts != NUMBERS_PER_ROW, axis=1)] |= ERR_ROW_COUNT
+
+    out_of_range = filled & ((cards < 1) | (cards > 90))
+    codes[out_of_range.any(axis=(1, 2))] |= ERR_NUMBER_RANGE
+
+    outside_column = filled & ((cards < _COL_MIN) | (cards > _COL_MAX))
+    codes[outside_column.any(axis=(1, 2))] |= ERR_COLUMN_RANGE
+
+    # Every pair of filled cells in a column must be ordered top to bottom
+    unsorted = np.zeros(len(cards), dtype=bool)
+    for upper in range(GRID_ROWS):
+        for lower in range(upper + 1, GRID_ROWS):
+            both = filled[:, upper] & filled[:, lower]
+            unsorted |= np.any(both & (cards[:, upper] > cards[:, lower]), axis=1)
+    codes[unsorted] |= ERR_VERTICAL_SORT
+
+    ordered = np.sort(np.where(filled, cards, 0).reshape(len(cards), -1), axis=1)
+    repeated = (ordered[:, 1:] == ordered[:, :-1]) & (ordered[:, 1:] != 0)
+    codes[repeated.any(axis=1)] |= ERR_DUPLICATE
+
+    return codes == 0, codes
+
+
+def card_lists_to_matrix(cards):
+    """
+    Pack JSON-form cards (nested lists, None for empty cells) into a matrix.
+
+    Returns:
+        tuple: (matrix, codes) - (N, 3, 7) int64 array, 0 for empty cells and
+        for cards that are not 3x7 matrices, and (N,) uint8 codes with
+        ERR_SHAPE set for those cards
+    """
+    codes = np.zeros(len(cards), dtype=np.uint8)
+
+    # Fast path: every card is a 3x7 matrix of numbers and None
+    try:
+        cells = np.array(cards, dtype=object)
+        if cells.shape == (len(cards), GRID_ROWS, GRID_COLS):
+            cells[cells == None] = 0  # noqa: E711 (element-wise comparison)
+            return cells.astype(np.int64), codes
+    except (TypeError, ValueError):
+        pass
+
+    matrix = np.zeros((len(cards), GRID_ROWS, GRID_COLS), dtype=np.int64)
+    for i, card in enumerate(cards):
+        if len(card) != GRID_ROWS or any(len(row) != GRID_COLS for row in card):
+            codes[i] = ERR_SHAPE
+        else:
+            matrix[i] = [[num or 0 for num in row] for row in card]
+    return matrix, codes
+
+
+def validate_card_lists(cards):
+    """
+    Validate JSON-form cards (nested lists, None for empty cells).
+
+    Cards that are not 3x7 matrices get ERR_SHAPE and are not checked further.
+
+    Returns:
+        tuple: (valid, codes) as in validate_cards()
+    """
+    matrix, codes = card_lists_to_matrix(cards)
+    _, matrix_codes = validate_cards(matrix)
+    codes = np.where(codes != 0, codes, matrix_codes).astype(np.uint8)
+    return codes == 0, codes
+
+
+def describe_errors(code):
+    """Human-readable description of an error code, e.g. 'duplicate numbers; column not sorted ascending'."""
+    return "; ".join(message for flag, message in ERROR_MESSAGES.items() if code & flag)
+
+
+def validate_card_integrity(card):
+    """
+    Validate a single JSON-form card.
+
+    Args:
+        card: 3x7 matrix with numbers or None
+
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    valid, codes = validate_card_lists([card])
+    if valid[0]:
+        return True, None
+    return False, describe_errors(codes[0])
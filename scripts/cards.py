@@ -0,0 +1,268 @@
+"""
+Shared card loading.
+
+load_card_set() is the one way scripts read cards, from all_cards.json, an
+NDJSON stream or a binary card archive. Every card is validated while it is
+parsed. The parsed arrays and validation results are cached next to the
+source file (all_cards.json -> all_cards.json.cache.npz), keyed by a hash
+of the file contents, so later runs skip parsing and validation entirely
+and any change to the file invalidates the cache. The file's size and
+modification time are stored too: while they match, the cache is used
+without hashing the file again.
+"""
+import hashlib
+import json
+import os
+import zipfile
+
+import numpy as np
+
+from card_engine import GRID_ROWS, GRID_COLS, cards_to_lists
+from card_fingerprint import fingerprint_words
+from card_store import (
+    is_card_archive, CardArchive, iter_ndjson,
+    select_json_cards, merge_card_ranges
+)
+from card_validation import validate_cards, card_lists_to_matrix, describe_errors
+
+DEFAULT_CARDS_FILE = "all_cards.json"
+CACHE_SUFFIX = ".cache.npz"
+CACHE_VERSION = 2
+_PARSE_CHUNK = 65536
+
+
+class CardSet:
+    """
+    Parsed and validated cards.
+
+    Attributes:
+        card_numbers: (N,) int64 card numbers
+        cards: (N, 3, 7) uint8 card array, 0 for empty cells
+        codes: (N,) uint8 validation error codes (0 = valid)
+        series: (N,) int64 series numbers, or None if the cards carry none
+        total_cards: total_cards declared by the source file, if any
+        counter_seed: Master seed of counter-generated cards, if any
+    """
+
+    def __init__(self, card_numbers, cards, codes, series=None, total_cards=None, counter_seed=None):
+        self.card_numbers = np.asarray(card_numbers, dtype=np.int64)
+        self.cards = np.asarray(cards, dtype=np.uint8).reshape(-1, GRID_ROWS, GRID_COLS)
+        self.codes = np.asarray(codes, dtype=np.uint8)
+        self.series = None if series is None else np.asarray(series, dtype=np.int64)
+        self.total_cards = total_cards
+        self.counter_seed = counter_seed
+        self._fingerprints = None
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __getitem__(self, where):
+        """Subset by slice, index array or boolean mask."""
+        return CardSet(
+            self.card_numbers[where], self.cards[where], self.codes[where],
+            None if self.series is None else self.series[where],
+            self.total_cards, self.counter_seed
+        )
+
+    @property
+    def valid(self):
+        """(N,) bool mask of valid cards."""
+        return self.codes == 0
+
+    @property
+    def fingerprints(self):
+        """(N, 2) uint64 fingerprints, computed on first use."""
+        if self._fingerprints is None:
+            self._fingerprints = fingerprint_words(self.cards)
+        return self._fingerprints
+
+    def errors(self):
+        """'Card #n: problem' messages for every invalid card."""
+        return [
+            f"Card #{card_number}: {describe_errors(code)}"
+            for card_number, code in zip(self.card_numbers[~self.valid].tolist(), self.codes[~self.valid].tolist())
+        ]
+
+    def select(self, ranges):
+        """Cards whose card_number falls in one of the inclusive (start, end) ranges."""
+        keep = np.zeros(len(self), dtype=bool)
+        for start, end in merge_card_ranges(ranges):
+            keep |= (self.card_numbers >= start) & (self.card_numbers <= end)
+        return self[keep]
+
+    def numbers(self):
+        """Cards as JSON-form nested lists (None for empty cells)."""
+        return cards_to_lists(self.cards)
+
+    def card_dicts(self):
+        """Cards as all_cards.json card objects ({'card_number', 'numbers'}, plus 'series')."""
+        dicts = [
+            {"card_number": card_number, "numbers": numbers}
+            for card_number, numbers in zip(self.card_numbers.tolist(), self.numbers())
+        ]
+        if self.series is not None:
+            for card_data, series in zip(dicts, self.series.tolist()):
+                card_data["series"] = series
+        return dicts
+
+
+def file_hash(path):
+    """BLAKE2b hex digest of a file's contents."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path):
+    return path + CACHE_SUFFIX
+
+
+def _source_stat(path):
+    st = os.stat(path)
+    return {"source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns}
+
+
+def _read_cache(cache, path):
+    """
+    CardSet stored in a cache file, or None if the cache is stale or unreadable.
+
+    The source file is only hashed when its size or modification time
+    differ from the ones stored in the cache. If the contents turn out to
+    be unchanged, the cache is rewritten with the new size and time.
+    """
+    try:
+        with np.load(cache, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != CACHE_VERSION:
+                return None
+            stat = _source_stat(path)
+            same_stat = all(meta.get(key) == value for key, value in stat.items())
+            if not same_stat and meta.get("source_hash") != file_hash(path):
+                return None
+            card_set = CardSet(
+                data["card_numbers"], data["cards"], data["codes"],
+                data["series"] if meta["has_series"] else None,
+                meta["total_cards"], meta["counter_seed"]
+            )
+    except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+    if not same_stat:
+        _write_cache(cache, meta["source_hash"], stat, card_set)
+    return card_set
+
+
+def _write_cache(path, source_hash, source_stat, card_set):
+    meta = {
+        "version": CACHE_VERSION,
+        "source_hash": source_hash,
+        **source_stat,
+        "has_series": card_set.series is not None,
+        "total_cards": card_set.total_cards,
+        "counter_seed": card_set.counter_seed,
+    }
+    # Write then rename, so an interrupted run never leaves a half-written cache
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f, meta=np.array(json.dumps(meta)), card_numbers=card_set.card_numbers,
+            cards=card_set.cards, codes=card_set.codes,
+            series=card_set.series if card_set.series is not None else np.zeros(0, dtype=np.int64)
+        )
+    os.replace(tmp_path, path)
+
+
+def _card_set_from_dicts(card_dicts, total_cards=None, counter_seed=None):
+    """Parse and validate an iterable of card objects, _PARSE_CHUNK cards at a time."""
+    card_numbers, series, matrices, codes = [], [], [], []
+    chunk = []
+
+    def flush():
+        matrix, shape_codes = card_lists_to_matrix([card_data["numbers"] for card_data in chunk])
+        _, matrix_codes = validate_cards(matrix)
+        codes.append(np.where(shape_codes != 0, shape_codes, matrix_codes).astype(np.uint8))
+        # Invalid numbers are clipped; their error codes already say what was wrong
+        matrices.append(np.clip(matrix, 0, 255).astype(np.uint8))
+        chunk.clear()
+
+    for card_data in card_dicts:
+        card_numbers.append(card_data["card_number"])
+        series.append(card_data.get("series"))
+        chunk.append(card_data)
+        if len(chunk) == _PARSE_CHUNK:
+            flush()
+    if chunk:
+        flush()
+
+    has_series = bool(series) and all(s is not None for s in series)
+    return CardSet(
+        card_numbers,
+        np.concatenate(matrices) if matrices else np.zeros((0, GRID_ROWS, GRID_COLS), dtype=np.uint8),
+        np.concatenate(codes) if codes else np.zeros(0, dtype=np.uint8),
+        series if has_series else None,
+        total_cards, counter_seed
+    )
+
+
+def _parse(path, ranges=None):
+    if is_card_archive(path):
+        with CardArchive(path) as archive:
+            where = slice(None) if ranges is None else np.concatenate(
+                [np.arange(len(archive))[archive.positions(start, end)]
+                 for start, end in merge_card_ranges(ranges)])
+            cards = np.array(archive.cards[where])
+            series = None
+            if archive.series_size:
+                series = np.arange(len(archive))[where] // archive.series_size + 1
+            _, codes = validate_cards(cards)
+            return CardSet(archive.card_numbers[where], cards, codes, series)
+
+    if os.path.splitext(path)[1].lower() in (".ndjson", ".jsonl"):
+        card_set = _card_set_from_dicts(iter_ndjson(path))
+        return card_set if ranges is None else card_set.select(ranges)
+
+    if ranges is not None:
+        return _card_set_from_dicts(select_json_cards(path, ranges))
+
+    # A full read is faster with json.load than card by card
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return _card_set_from_dicts(data.get("cards", []), data.get("total_cards"), data.get("counter_seed"))
+
+
+def load_card_set(path=DEFAULT_CARDS_FILE, ranges=None, use_cache=True):
+    """
+    Load and validate cards from all_cards.json, an NDJSON stream or a binary card archive.
+
+    The whole file is parsed and validated once and the result is cached;
+    later calls, with or without ranges, read the cache. Binary card
+    archives are the exception for ranged loads: only the selected cards
+    are read, since the archive is already memory-mapped, and no cache is
+    written.
+
+    Args:
+        path: Card file
+        ranges: Optional list of inclusive (start, end) card-number ranges
+        use_cache: Read and write the .cache.npz file next to the card file
+
+    Returns:
+        CardSet
+    """
+    cache = cache_path(path)
+    if use_cache and os.path.exists(cache):
+        card_set = _read_cache(cache, path)
+        if card_set is not None:
+            return card_set if ranges is None else card_set.select(ranges)
+
+    if ranges is not None and (not use_cache or is_card_archive(path)):
+        return _parse(path, ranges)
+
+    if use_cache:
+        # Taken before parsing, so a file changed during the parse fails the next check
+        source_stat = _source_stat(path)
+        source_hash = file_hash(path)
+    card_set = _parse(path)
+    if use_cache:
+        _write_cache(cache, source_hash, source_stat, card_set)
+    return card_set if ranges is None else card_set.select(ranges)
@@ -8,7 +8,7 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 # --- CONFIGURATION ---
-SUPABASE_URL = "https://mtugbmwikuvfobykuvtl.supabase.co"
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://mtugbmwikuvfobykuvtl.supabase.co")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY") # Read from environment variable
 
 if not SUPABASE_KEY:
@@ -0,0 +1,37 @@
+"""
+Convert cards between all_cards.json and the compact binary archive.
+
+The direction follows the input file: a binary archive becomes JSON,
+anything else is read as all_cards.json and becomes a binary archive.
+
+Usage:
+    python convert_cards.py all_cards.json all_cards.bin
+    python convert_cards.py all_cards.bin all_cards.json
+"""
+import argparse
+import os
+import sys
+
+from card_store import is_card_archive, json_to_binary, binary_to_json
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert cards between JSON and the binary archive")
+    parser.add_argument("source", help="all_cards.json or binary archive to read")
+    parser.add_argument("target", help="File to write")
+    args = parser.parse_args()
+
+    if is_card_archive(args.source):
+        count = binary_to_json(args.source, args.target)
+    else:
+        count = json_to_binary(args.source, args.target)
+
+    print(f"[OK] Converted {count} cards: {args.source} -> {args.target} "
+          f"({os.path.getsize(args.target) / 1024:,.1f} KB)")
+
+if __name__ == "__main__":
+    main()
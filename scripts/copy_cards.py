@@ -0,0 +1,203 @@
+"""
+Bulk load cards over a direct Postgres connection with COPY.
+
+For large events: instead of INSERT requests through the REST API, cards
+are streamed with COPY ... FROM STDIN into a temporary staging table and
+merged into cards with one INSERT ... SELECT, which skips cards already in
+the database (by fingerprint, see database/add_fingerprint.sql) and returns
+the database id of every card. Loading is one transaction: either every
+card is merged or none is.
+
+Requires psycopg 3 (pip install "psycopg[binary]") and the database
+connection string, e.g. from Supabase Dashboard -> Project Settings ->
+Database, in DATABASE_URL or --dsn.
+
+Usage:
+    python copy_cards.py                                  # load all_cards.json
+    python copy_cards.py --input all_cards.bin --mapping card_ids.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from card_engine import GRID_ROWS, GRID_COLS, NUMBERS_PER_CARD
+from card_store import parse_card_ranges
+from cards import DEFAULT_CARDS_FILE, load_card_set
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# --- CONFIGURATION ---
+DATABASE_URL = os.getenv("DATABASE_URL")
+COPY_CHUNK_SIZE = 65536  # Cards per COPY write
+
+# COPY text lines are built from fixed-width tokens, so a whole chunk is a
+# few numpy gathers: every cell of the JSON is an 8-byte token holding its
+# value and the punctuation around it, every fingerprint number a 4-byte one.
+# Fields are padded with spaces, which the BIGINT and JSONB input functions
+# accept; the merge strips them from the fingerprint.
+_CARD_NUMBER_WIDTH = 24  # Digits of any int64, padding and tab
+
+
+def _json_tokens():
+    """(21, 91) uint64: token of value v (0 = null) at cell position i of a card."""
+    tokens = []
+    for position in range(GRID_ROWS * GRID_COLS):
+        row, col = divmod(position, GRID_COLS)
+        prefix = (("[" if row == 0 else "") + "[") if col == 0 else ""
+        suffix = "," if col < GRID_COLS - 1 else ("]," if row < GRID_ROWS - 1 else "]]\t")
+        tokens.append([
+            (prefix + ("null" if value == 0 else f"{value:4d}") + suffix).ljust(8)
+            for value in range(91)
+        ])
+    return np.frombuffer("".join(sum(tokens, [])).encode('ascii'), dtype=np.uint64).reshape(len(tokens), 91)
+
+
+_JSON_TOKENS = _json_tokens()
+_FINGERPRINT_TOKENS = np.frombuffer("".join(
+    f"{value:3d}" + ("," if position < NUMBERS_PER_CARD - 1 else "\n")
+    for position in range(NUMBERS_PER_CARD) for value in range(91)
+).encode('ascii'), dtype=np.uint32).reshape(NUMBERS_PER_CARD, 91)
+
+_STAGING_TABLE = """
+    CREATE TEMP TABLE cards_staging (
+        card_number BIGINT NOT NULL,
+        numbers JSONB NOT NULL,
+        fingerprint TEXT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# inserted only holds the new rows; cards already in the database are found
+# in cards itself (the statement sees the table as it was before the insert)
+_MERGE = """
+    WITH staged AS (
+        SELECT card_number, numbers, replace(fingerprint, ' ', '') AS fingerprint
+        FROM cards_staging
+    ), inserted AS (
+        INSERT INTO cards (numbers)
+        SELECT numbers FROM staged ORDER BY card_number
+        ON CONFLICT (fingerprint) DO NOTHING
+        RETURNING id, fingerprint
+    )
+    SELECT s.card_number, COALESCE(i.id, c.id), i.id IS NOT NULL
+    FROM staged s
+    LEFT JOIN inserted i ON i.fingerprint = s.fingerprint
+    LEFT JOIN cards c ON c.fingerprint = s.fingerprint
+    ORDER BY s.card_number
+"""
+
+
+def copy_lines(card_numbers, cards):
+    """
+    COPY text-format lines (card_number, numbers JSON, fingerprint) for valid cards.
+
+    Returns:
+        bytes
+    """
+    card_numbers = np.asarray(card_numbers, dtype=np.int64)
+    flat = cards.reshape(len(cards), GRID_ROWS * GRID_COLS)
+    # A valid card has exactly NUMBERS_PER_CARD non-zero cells
+    fingerprints = np.sort(flat, axis=1)[:, -NUMBERS_PER_CARD:]
+
+    number_field = np.full((len(cards), _CARD_NUMBER_WIDTH), ord(" "), dtype=np.uint8)
+    number_field[:, -1] = ord("\t")
+    digits = card_numbers.astype("S20").view(np.uint8).reshape(len(cards), 20)
+    number_field[:, :20] = np.where(digits == 0, ord(" "), digits)
+
+    return np.concatenate([
+        number_field,
+        _JSON_TOKENS[np.arange(flat.shape[1]), flat].view(np.uint8),
+        _FINGERPRINT_TOKENS[np.arange(NUMBERS_PER_CARD), fingerprints].view(np.uint8),
+    ], axis=1).tobytes()
+
+
+def copy_card_file(path, ranges=None, dsn=DATABASE_URL, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Load cards of a card file into the cards table with COPY.
+
+    Args:
+        path: all_cards.json, NDJSON stream or binary card archive
+        ranges: Optional list of inclusive (start, end) card-number ranges
+        dsn: Postgres connection string
+
+    Returns:
+        tuple: (card_numbers, ids, inserted) - card numbers in ascending
+        order, their database ids, and whether each card was newly inserted
+    """
+    if psycopg is None:
+        raise RuntimeError('psycopg is not installed (pip install "psycopg[binary]")')
+    if not dsn:
+        raise ValueError("No database connection string (set DATABASE_URL or pass --dsn)")
+
+    card_set = load_card_set(path, ranges)
+    errors = card_set.errors()
+    if errors:
+        print(f"  [ERROR] Found {len(errors)} invalid cards:")
+        for error in errors:
+            print(f"    - {error}")
+        raise ValueError("Invalid cards detected. Cannot load.")
+
+    print(f"\nLoading {len(card_set)} cards from {path} with COPY...")
+    start = time.perf_counter()
+    with psycopg.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(_STAGING_TABLE)
+            with cur.copy("COPY cards_staging (card_number, numbers, fingerprint) FROM STDIN") as copy:
+                for i in range(0, len(card_set), chunk_size):
+                    copy.write(copy_lines(card_set.card_numbers[i:i + chunk_size],
+                                          card_set.cards[i:i + chunk_size]))
+            print(f"  [OK] Staged {len(card_set)} cards ({time.perf_counter() - start:.1f}s)")
+
+            cur.execute("ANALYZE cards_staging")
+            cur.execute(_MERGE)
+            rows = cur.fetchall()
+
+    card_numbers = [row[0] for row in rows]
+    ids = [row[1] for row in rows]
+    inserted = [row[2] for row in rows]
+    print(f"  [OK] Merged in {time.perf_counter() - start:.1f}s: {sum(inserted)} inserted, "
+          f"{len(rows) - sum(inserted)} already in the database")
+    return card_numbers, ids, inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load cards into Postgres with COPY")
+    parser.add_argument("--input", default=DEFAULT_CARDS_FILE,
+                        help=f"Card file: all_cards.json, NDJSON or binary archive (default: {DEFAULT_CARDS_FILE})")
+    parser.add_argument("--range", dest="ranges", type=parse_card_ranges,
+                        help="Only load these card numbers, e.g. 201-350 or 1-50,101-150")
+    parser.add_argument("--dsn", default=DATABASE_URL,
+                        help="Postgres connection string (default: $DATABASE_URL)")
+    parser.add_argument("--mapping",
+                        help="Save card_number -> database id as JSON to this file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TOMBOLA COPY LOADER")
+    print("=" * 60)
+
+    try:
+        card_numbers, ids, _ = copy_card_file(args.input, args.ranges, args.dsn)
+    except (RuntimeError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    if args.mapping:
+        with open(args.mapping, 'w', encoding='utf-8') as f:
+            json.dump(dict(zip(card_numbers, ids)), f, indent=2)
+        print(f"[OK] Saved {len(ids)} card ids to {args.mapping}")
+
+
+if __name__ == "__main__":
+    main()
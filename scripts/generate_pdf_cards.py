@@ -1,11 +1,27 @@
-import json
+import os
 import sys
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from PIL import Image
+import numpy as np
+
+from card_qr import qr_template, QR_BORDER
+from card_store import parse_card_ranges
+from card_upload import read_card_ids
+from cards import load_card_set, file_hash
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
 
 # Fix encoding for Windows
 if sys.platform == 'win32':
@@ -15,9 +31,22 @@ if sys.platform == 'win32':
 # Configuration
 CARDS_JSON_FILE = "all_cards.json"
 BACKGROUND_IMAGE = "../cartella orizzonatale.jpeg"
+PRINT_DPI = 300  # Background resolution on paper (None/0 = embed the source image as is)
+BACKGROUND_QUALITY = 90  # JPEG quality of the print background
+PRINT_BACKGROUND_SUFFIX = ".print.jpg"
 OUTPUT_PDF = "cartelle_stampabili_201-350.pdf"
 START_CARD = 201  # First card to include (1-indexed)
 END_CARD = 350    # Last card to include (1-indexed)
+CARD_RANGES = None  # Optional list of (start, end) ranges, overrides START_CARD/END_CARD
+PDF_WORKERS = 1  # Processes rendering page shards (None/0 = one per CPU); >1 needs pypdf to merge,
+                 # without it pages are rendered in-process
+PDF_MIN_PAGES_PER_WORKER = 250  # Smaller jobs use fewer workers; under this many pages, in-process
+
+# Claim QR codes: card_number -> database id, from an upload checkpoint
+# (all_cards.json.upload.ndjson) or sync_cards.py --mapping. None = no QR codes.
+QR_IDS_FILE = None
+BASE_URL = "https://tombola-natale-sidea.vercel.app"  # Same as generate_unique_cards.py
+QR_SIZE = 0.20  # QR side (quiet zone included) as a fraction of the card height
 
 # PDF Layout (A4 Landscape)
 PAGE_WIDTH, PAGE_HEIGHT = landscape(A4)  # 842 x 595 points
@@ -32,60 +61,41 @@ GAP = 15
 CARD_WIDTH = (PAGE_WIDTH - (GAP * (CARDS_PER_ROW + 1))) / CARDS_PER_ROW
 CARD_HEIGHT = (PAGE_HEIGHT - (GAP * (CARDS_PER_COL + 1))) / CARDS_PER_COL
 
+# Series layout: one full series (6 cards covering 1-90) per A4 portrait sheet.
+# Cards keep the landscape card proportions so the grid margins still fit.
+SERIES_PAGE_SIZE = A4
+SERIES_SIZE = 6
+SERIES_PER_ROW = 2
+SERIES_PER_COL = 3
+SERIES_CARD_WIDTH = (SERIES_PAGE_SIZE[0] - (GAP * (SERIES_PER_ROW + 1))) / SERIES_PER_ROW
+SERIES_CARD_HEIGHT = SERIES_CARD_WIDTH * CARD_HEIGHT / CARD_WIDTH
+
 # Card grid configuration (matching frontend)
 GRID_ROWS = 3
 GRID_COLS = 7  # 7 columns format
+NUMBER_FONT = "Helvetica-Bold"
 
-def validate_card(card_data):
-    """
-    Validate that a card has exactly 15 numbers (5 per row).
-
-    Args:
-        card_data: Card data dict
-    Returns:
-        tuple: (is_valid, error_message)
-    """
-    numbers = card_data['numbers']
-    card_num = card_data['card_number']
-
-    if len(numbers) != 3:
-        return False, f"Card #{card_num}: Wrong number of rows ({len(numbers)}, expected 3)"
-
-    total_numbers = 0
-    for row_idx, row in enumerate(numbers):
-        if len(row) != 7:
-            return False, f"Card #{card_num}: Row {row_idx+1} has {len(row)} columns (expected 7)"
-
-        row_numbers = sum(1 for cell in row if cell is not None)
-        total_numbers += row_numbers
-
-        if row_numbers != 5:
-            return False, f"Card #{card_num}: Row {row_idx+1} has {row_numbers} numbers (expected 5)"
+def card_ranges():
+    """Selected card-number ranges: CARD_RANGES, or START_CARD-END_CARD."""
+    return CARD_RANGES or [(START_CARD, END_CARD)]
 
-    if total_numbers != 15:
-        return False, f"Card #{card_num}: Total {total_numbers} numbers (expected 15)"
-
-    return True, None
+def describe_ranges():
+    return ", ".join(f"#{start}-#{end}" for start, end in card_ranges())
 
 def load_cards():
-    """Load cards from JSON file."""
+    """
+    Load the selected cards from the JSON file or binary card archive.
+    Parsing and validation come from the shared card cache when it is up to date.
+    """
     print(f"Loading cards from {CARDS_JSON_FILE}...")
-    with open(CARDS_JSON_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Extract cards 201-300 (indices 200-299 in array)
-    all_cards = data['cards']
-    selected_cards = all_cards[START_CARD-1:END_CARD]
+    card_set = load_card_set(CARDS_JSON_FILE, card_ranges())
+    selected_cards = card_set.card_dicts()
 
-    print(f"  [OK] Loaded {len(selected_cards)} cards (#{START_CARD}-#{END_CARD})")
+    print(f"  [OK] Loaded {len(selected_cards)} cards ({describe_ranges()})")
 
     # Validate all cards
     print("\nValidating cards...")
-    invalid_cards = []
-    for card in selected_cards:
-        is_valid, error = validate_card(card)
-        if not is_valid:
-            invalid_cards.append(error)
+    invalid_cards = card_set.errors()
 
     if invalid_cards:
         print(f"  [ERROR] Found {len(invalid_cards)} invalid cards:")
@@ -94,104 +104,383 @@ def load_cards():
         raise ValueError("Invalid cards detected. Cannot generate PDF.")
 
     print(f"  [OK] All {len(selected_cards)} cards validated successfully")
-    print(f"       Each card has exactly 15 numbers (5 per row)")
+    print(f"       5 numbers per row, column ranges, vertical sorting, no duplicates")
 
     return selected_cards
 
-def draw_card_on_pdf(c, card_data, x, y, width, height):
+def load_qr_modules(cards):
     """
-    Draw a single tombola card on the PDF canvas.
+    QR module matrices of the cards, keyed by card_number, from QR_IDS_FILE.
+    Cards without a database id get no QR code.
+    """
+    print(f"\nLoading card ids from {QR_IDS_FILE}...")
+    card_ids = read_card_ids(QR_IDS_FILE)
+    numbers = [card['card_number'] for card in cards if card['card_number'] in card_ids]
+    missing = len(cards) - len(numbers)
+    if missing:
+        print(f"  [WARNING] {missing} cards have no database id and will be printed without QR code")
+    if not numbers:
+        return {}
+
+    ids = [card_ids[number] for number in numbers]
+    template = qr_template(BASE_URL, max(len(str(card_id)) for card_id in ids))
+    print(f"  [OK] QR codes for {len(numbers)} cards (version {template.version}, {template.size}x{template.size} modules)")
+    return dict(zip(numbers, template.modules(ids)))
+
+def draw_qr_on_pdf(c, modules, x, y, size):
+    """
+    Draw a QR code as vector rectangles: a white square (quiet zone included)
+    and one filled path made of the horizontal runs of dark modules.
 
     Args:
-        c: ReportLab canvas
-        card_data: Card data dict with 'card_number' and 'numbers'
-        x, y: Bottom-left corner position
-        width, height: Card dimensions
+        modules: (n, n) bool module matrix, True for dark
+        x, y: Bottom-left corner
+        size: Side of the code, quiet zone included
     """
-    # Draw background image
-    try:
-        img = ImageReader(BACKGROUND_IMAGE)
-        c.drawImage(img, x, y, width=width, height=height, preserveAspectRatio=True, mask='auto')
-    except Exception as e:
-        print(f"  [WARNING] Could not load background image: {e}")
-        # Draw fallback border
-        c.setStrokeColorRGB(0, 0, 0)
-        c.setLineWidth(2)
-        c.rect(x, y, width, height)
-
-    # Extract numbers matrix (3x9 but we only show first 7 columns)
-    numbers = card_data['numbers']
+    n = len(modules)
+    module = size / (n + 2 * QR_BORDER)
+    c.setFillColorRGB(1, 1, 1)
+    c.rect(x, y, size, size, fill=1, stroke=0)
+
+    padded = np.zeros((n, n + 2), dtype=np.int8)
+    padded[:, 1:-1] = modules
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    path = c.beginPath()
+    origin_x, top = x + QR_BORDER * module, y + size - QR_BORDER * module
+    for row, start, end in zip(rows.tolist(), starts.tolist(), ends.tolist()):
+        path.rect(origin_x + start * module, top - (row + 1) * module, (end - start) * module, module)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawPath(path, fill=1, stroke=0)
+
+def card_geometry(width, height):
+    """
+    Grid layout of a card of the given size, relative to its bottom-left corner.
 
+    Returns:
+        tuple: (margin_x, margin_y, cell_width, cell_height, font_size)
+    """
     # Grid positioning (adjusted for landscape orientation with decorative border)
     # Optimized margins to fit within the yellow border (from test results)
     margin_x = width * 0.14  # 14% margin on sides
     margin_y = height * 0.34  # 34% margin on top/bottom
 
-    grid_width = width - (2 * margin_x)
-    grid_height = height - (2 * margin_y)
+    cell_width = (width - (2 * margin_x)) / GRID_COLS
+    cell_height = (height - (2 * margin_y)) / GRID_ROWS
+    font_size = min(cell_width, cell_height) * 0.45  # Slightly smaller to avoid overlap
+    return margin_x, margin_y, cell_width, cell_height, font_size
+
+def cell_center(width, height, row_idx, col_idx):
+    """Center of a grid cell, relative to the bottom-left corner of the card."""
+    margin_x, margin_y, cell_width, cell_height, _ = card_geometry(width, height)
+    return (margin_x + (col_idx * cell_width) + (cell_width / 2),
+            height - margin_y - (row_idx * cell_height) - (cell_height / 2))
+
+def _cell_frame(path, width, height, row_idx, col_idx):
+    """Add the rounded frame of a grid cell to a path."""
+    _, _, cell_width, cell_height, _ = card_geometry(width, height)
+    cell_x, cell_y = cell_center(width, height, row_idx, col_idx)
+    path.roundRect(
+        cell_x - cell_width * 0.42,
+        cell_y - cell_height * 0.42,
+        cell_width * 0.84,
+        cell_height * 0.84,
+        cell_width * 0.08  # Rounded corners
+    )
+
+def print_background(path, width, height, dpi=PRINT_DPI, quality=BACKGROUND_QUALITY):
+    """
+    Background image for cards of width x height points, downsampled to dpi
+    (never upsampled) and recompressed as JPEG.
 
-    cell_width = grid_width / GRID_COLS
-    cell_height = grid_height / GRID_ROWS
+    The derivative is cached next to the source (<source>.<hash>-<w>x<h>-q<quality>.print.jpg),
+    keyed by the source contents and the target size, so it is computed once
+    per layout and any change to the source invalidates it.
 
-    # Font settings (matching frontend - bold, black)
-    c.setFillColorRGB(0, 0, 0)  # Black color
-    font_size = min(cell_width, cell_height) * 0.45  # Slightly smaller to avoid overlap
-    c.setFont("Helvetica-Bold", font_size)
+    Returns:
+        str: Path of the derivative
+    """
+    with Image.open(path) as img:
+        # drawImage(preserveAspectRatio=True) fits the image inside the card
+        scale = min(width / img.width, height / img.height) * dpi / 72
+        size = (min(img.width, round(img.width * scale)), min(img.height, round(img.height * scale)))
+        derivative = f"{path}.{file_hash(path)[:12]}-{size[0]}x{size[1]}-q{quality}{PRINT_BACKGROUND_SUFFIX}"
+        if os.path.exists(derivative):
+            return derivative
+
+        img = img.convert("RGB")
+        if size != img.size:
+            img = img.resize(size, Image.LANCZOS)
+        # Write then rename, so concurrent workers never read a half-written file
+        tmp_path = derivative + f".{os.getpid()}.tmp"
+        img.save(tmp_path, "JPEG", quality=quality, optimize=True)
+    os.replace(tmp_path, derivative)
+    return derivative
+
+@lru_cache(maxsize=None)
+def _background(path, width, height):
+    """Background image for cards of this size, decoded once per process; None if it cannot be loaded."""
+    try:
+        return ImageReader(print_background(path, width, height) if PRINT_DPI else path)
+    except Exception as e:
+        print(f"  [WARNING] Could not load background image: {e}")
+        return None
 
-    # Draw all cells (both empty and filled)
-    for row_idx in range(GRID_ROWS):
-        for col_idx in range(GRID_COLS):  # Only first 7 columns
-            number = numbers[row_idx][col_idx]
-
-            # Calculate cell center position
-            cell_x = x + margin_x + (col_idx * cell_width) + (cell_width / 2)
-            cell_y = y + height - margin_y - (row_idx * cell_height) - (cell_height / 2)
-
-            # Draw cell background (without alpha for consistency)
-            if number is not None:
-                # Filled cell - white background
-                c.setFillColorRGB(1, 1, 1)  # Pure white
-                c.setStrokeColorRGB(0.75, 0.75, 0.75)  # Medium gray border
-            else:
-                # Empty cell - light gray background
-                c.setFillColorRGB(0.93, 0.93, 0.93)  # Light gray (no transparency)
-                c.setStrokeColorRGB(0.80, 0.80, 0.80)  # Slightly darker gray border
+@lru_cache(maxsize=None)
+def number_widths(font_size):
+    """Width of every number 1-90 in the number font at this size (index = number)."""
+    return [0.0] + [pdfmetrics.stringWidth(str(number), NUMBER_FONT, font_size) for number in range(1, 91)]
 
+def card_template(c, width, height):
+    """
+    Name of the card template of the canvas for cards of this size, defined
+    on first use: a PDF form holding the background image and every cell as
+    an empty cell, plus one form per cell with its filled-cell frame (named
+    <template>_<row>_<col>). The document stores them once; each card places
+    the template, the frames of its filled cells and its numbers.
+    """
+    name = f"card_{width:.2f}x{height:.2f}"
+    if c.hasForm(name):
+        return name
+
+    c.beginForm(name, 0, 0, width, height)
+    background = _background(BACKGROUND_IMAGE, width, height)
+    if background is not None:
+        c.drawImage(background, 0, 0, width=width, height=height, preserveAspectRatio=True, mask='auto')
+    else:
+        # Draw fallback border
+        c.setStrokeColorRGB(0, 0, 0)
+        c.setLineWidth(2)
+        c.rect(0, 0, width, height)
+
+    # Empty cell - light gray background, slightly darker gray border
+    path = c.beginPath()
+    for row_idx in range(GRID_ROWS):
+        for col_idx in range(GRID_COLS):
+            _cell_frame(path, width, height, row_idx, col_idx)
+    c.setFillColorRGB(0.93, 0.93, 0.93)
+    c.setStrokeColorRGB(0.80, 0.80, 0.80)
+    c.setLineWidth(1)
+    c.drawPath(path, fill=1, stroke=1)
+    c.endForm()
+
+    # Filled cell - white background, medium gray border
+    for row_idx in range(GRID_ROWS):
+        for col_idx in range(GRID_COLS):
+            c.beginForm(f"{name}_{row_idx}_{col_idx}", 0, 0, width, height)
+            path = c.beginPath()
+            _cell_frame(path, width, height, row_idx, col_idx)
+            c.setFillColorRGB(1, 1, 1)
+            c.setStrokeColorRGB(0.75, 0.75, 0.75)
             c.setLineWidth(1)
-            c.roundRect(
-                cell_x - cell_width * 0.42,
-                cell_y - cell_height * 0.42,
-                cell_width * 0.84,
-                cell_height * 0.84,
-                cell_width * 0.08,  # Rounded corners
-                fill=1,
-                stroke=1
-            )
-
-            # Draw number if cell is filled
-            if number is not None:
-                c.setFillColorRGB(0, 0, 0)  # Black
-                text_width = c.stringWidth(str(number), "Helvetica-Bold", font_size)
-                text_x = cell_x - (text_width / 2)
-                text_y = cell_y - (font_size / 3)  # Adjust for vertical centering
-
-                c.drawString(text_x, text_y, str(number))
+            c.drawPath(path, fill=1, stroke=1)
+            c.endForm()
+    return name
+
+def draw_card_on_pdf(c, card_data, x, y, width, height, qr_modules=None):
+    """
+    Draw a single tombola card on the PDF canvas: the card template, then
+    the frames of the filled cells (white, over the empty ones) and their numbers.
+
+    Args:
+        c: ReportLab canvas
+        card_data: Card data dict with 'card_number' and 'numbers'
+        x, y: Bottom-left corner position
+        width, height: Card dimensions
+        qr_modules: Optional QR module matrix, drawn below the grid on the right
+    """
+    template = card_template(c, width, height)
+    margin_x, margin_y, _, _, font_size = card_geometry(width, height)
+    numbers = card_data['numbers']
+    filled = [(row_idx, col_idx, numbers[row_idx][col_idx])
+              for row_idx in range(GRID_ROWS) for col_idx in range(GRID_COLS)
+              if numbers[row_idx][col_idx] is not None]
+
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(template)
+
+    for row_idx, col_idx, _ in filled:
+        c.doForm(f"{template}_{row_idx}_{col_idx}")
+
+    # Numbers (matching frontend - bold, black), in one text object
+    widths = number_widths(font_size)
+    text = c.beginText()
+    text.setFont(NUMBER_FONT, font_size)
+    text.setFillColorRGB(0, 0, 0)
+    for row_idx, col_idx, number in filled:
+        cell_x, cell_y = cell_center(width, height, row_idx, col_idx)
+        text.setTextOrigin(cell_x - (widths[number] / 2), cell_y - (font_size / 3))  # Adjust for vertical centering
+        text.textOut(str(number))
+    c.drawText(text)
+
+    # Claim QR code, right-aligned with the grid, just below it
+    if qr_modules is not None:
+        qr_size = height * QR_SIZE
+        draw_qr_on_pdf(c, qr_modules, width - margin_x - qr_size, margin_y - qr_size - height * 0.02, qr_size)
 
     # Optional: Draw card number at the bottom
     c.setFont("Helvetica-Bold", 10)
     c.setFillColorRGB(0.3, 0.3, 0.3)
     card_num_text = f"Cartella #{card_data['card_number']}"
     text_width = c.stringWidth(card_num_text, "Helvetica-Bold", 10)
-    c.drawString(x + (width - text_width) / 2, y + 5, card_num_text)
+    c.drawString((width - text_width) / 2, 5, card_num_text)
+    c.restoreState()
+
+def card_positions(cards_per_row, cards_per_col, card_width, card_height, page_height):
+    """Bottom-left corner of every card slot on a page, top-left slot first."""
+    positions = []
+    for row in range(cards_per_col):
+        for col in range(cards_per_row):
+            x = GAP + (col * (card_width + GAP))
+            y = page_height - ((row + 1) * (card_height + GAP))  # Flip Y axis
+            positions.append((x, y))
+    return positions
+
+def group_series(cards):
+    """
+    Split cards into full series using their 'series' field.
+
+    Raises:
+        ValueError: if a card has no series or a series is incomplete
+    """
+    pages = []
+    for card in cards:
+        if 'series' not in card:
+            raise ValueError(f"Card #{card['card_number']} has no series (generate with --series)")
+        if pages and pages[-1][0]['series'] == card['series']:
+            pages[-1].append(card)
+        else:
+            pages.append([card])
+
+    incomplete = [page[0]['series'] for page in pages if len(page) != SERIES_SIZE]
+    if incomplete:
+        raise ValueError(f"Incomplete series in card range: {incomplete}")
+    return pages
+
+def page_layout(series=False):
+    """
+    Returns:
+        tuple: (pagesize, cards per row, cards per column, card width, card height)
+    """
+    if series:
+        return SERIES_PAGE_SIZE, SERIES_PER_ROW, SERIES_PER_COL, SERIES_CARD_WIDTH, SERIES_CARD_HEIGHT
+    return landscape(A4), CARDS_PER_ROW, CARDS_PER_COL, CARD_WIDTH, CARD_HEIGHT
+
+def render_pages(output_path, pages, series=False, qr_modules=None, progress=True):
+    """
+    Write pages of cards to a PDF file on one canvas.
+
+    Args:
+        output_path: PDF file to write
+        pages: List of pages, each a list of card dicts
+        series: Series layout (one series per A4 portrait page)
+        qr_modules: Optional dict card_number -> QR module matrix
+        progress: Print a line per page
+    """
+    pagesize, per_row, per_col, card_width, card_height = page_layout(series)
+    qr_modules = qr_modules or {}
+    c = canvas.Canvas(output_path, pagesize=pagesize)
+
+    positions = card_positions(per_row, per_col, card_width, card_height, pagesize[1])
+    total_pages = len(pages)
+
+    for page_num, page_cards in enumerate(pages):
+        if progress:
+            print(f"  [OK] Processing page {page_num + 1}/{total_pages}")
+
+        for card_data, (x, y) in zip(page_cards, positions):
+            draw_card_on_pdf(c, card_data, x, y, card_width, card_height,
+                             qr_modules.get(card_data['card_number']))
+
+        if series:
+            c.setFont("Helvetica-Bold", 12)
+            c.setFillColorRGB(0.3, 0.3, 0.3)
+            c.drawString(GAP, GAP, f"Serie #{page_cards[0]['series']}")
+
+        # New page if there are more cards
+        if page_num + 1 < total_pages:
+            c.showPage()
+
+    # Save PDF
+    c.save()
+
+def _render_shard(output_path, pages, series, qr_modules, background_image, print_dpi):
+    """Worker: render one shard of pages. Settings are passed in, not inherited."""
+    global BACKGROUND_IMAGE, PRINT_DPI
+    BACKGROUND_IMAGE, PRINT_DPI = background_image, print_dpi
+    render_pages(output_path, pages, series, qr_modules, progress=False)
+    return output_path, len(pages)
+
+def render_shards(jobs, series=False, qr_modules=None, workers=None):
+    """
+    Render (output_path, pages) jobs, one PDF file each, in worker processes.
+
+    Args:
+        jobs: List of (output_path, pages)
+        workers: Worker processes (default: one per CPU; 1 = in-process)
+    """
+    qr_modules = qr_modules or {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+
+    def job_args(path, pages):
+        # Only the QR codes of the shard's cards are sent to the worker
+        shard_qr = {card['card_number']: qr_modules[card['card_number']]
+                    for page in pages for card in page if card['card_number'] in qr_modules}
+        return path, pages, series, shard_qr, BACKGROUND_IMAGE, PRINT_DPI
+
+    if workers == 1:
+        results = (_render_shard(*job_args(path, pages)) for path, pages in jobs)
+        for path, count in results:
+            print(f"  [OK] Rendered {path} ({count} pages)")
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_shard, *job_args(path, pages)) for path, pages in jobs]
+        for future in as_completed(futures):
+            path, count = future.result()
+            print(f"  [OK] Rendered {path} ({count} pages)")
+
+def merge_pdfs(paths, output_path):
+    """Concatenate PDF files, in order, into output_path (requires pypdf)."""
+    if PdfWriter is None:
+        raise RuntimeError('pypdf is not installed (pip install pypdf), needed to merge PDF shards')
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    # Every shard carries its own copy of the background and cell forms
+    writer.compress_identical_objects()
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+
+def split_output_name(index):
+    """OUTPUT_PDF with a part number: cartelle.pdf -> cartelle_001.pdf."""
+    stem, ext = os.path.splitext(OUTPUT_PDF)
+    return f"{stem}_{index:03d}{ext or '.pdf'}"
+
+def generate_pdf(series=False, workers=PDF_WORKERS, pages_per_file=None):
+    """
+    Generate PDF with all cards.
+    With series=True, every page holds one full series (6 cards, A4 portrait).
+
+    Args:
+        workers: Processes rendering pages (None/0 = one per CPU), at most
+            one per PDF_MIN_PAGES_PER_WORKER pages. With more than one, pages
+            are split into one page-aligned shard per worker and the shards
+            are merged into OUTPUT_PDF
+        pages_per_file: Write one PDF per this many pages instead of one
+            file (OUTPUT_PDF with _001, _002, ... before the extension)
+    """
+    pagesize, per_row, per_col, card_width, card_height = page_layout(series)
 
-def generate_pdf():
-    """Generate PDF with all cards."""
     print("=" * 60)
     print("TOMBOLA PDF GENERATOR")
     print("=" * 60)
-    print(f"Cards range: #{START_CARD} to #{END_CARD}")
-    print(f"Layout: {CARDS_PER_ROW}x{CARDS_PER_COL} cards per page")
-    print(f"Output: {OUTPUT_PDF}")
+    print(f"Cards range: {describe_ranges()}")
+    print(f"Layout: {per_row}x{per_col} cards per page{' (one series per page)' if series else ''}")
+    print(f"Output: {split_output_name(1) + ', ...' if pages_per_file else OUTPUT_PDF}")
     print("=" * 60)
 
     # Load cards
@@ -201,58 +490,91 @@ def generate_pdf():
         print("[ERROR] No cards to process!")
         return
 
+    qr_modules = load_qr_modules(cards) if QR_IDS_FILE else {}
+
+    if series:
+        pages = group_series(cards)
+    else:
+        pages = [cards[i:i + per_row * per_col] for i in range(0, len(cards), per_row * per_col)]
+    total_pages = len(pages)
+    # Starting a worker and merging its shard cost more than rendering a few pages
+    workers = max(1, min(workers or os.cpu_count() or 1, total_pages // PDF_MIN_PAGES_PER_WORKER))
+    if workers > 1 and not pages_per_file and PdfWriter is None:
+        print("[WARNING] pypdf is not installed (pip install pypdf), needed to merge PDF shards: "
+              "rendering in-process")
+        workers = 1
+
+    # Print background, prepared once here so worker processes find it cached
+    if PRINT_DPI and os.path.exists(BACKGROUND_IMAGE):
+        background = print_background(BACKGROUND_IMAGE, card_width, card_height)
+        with Image.open(background) as img:
+            print(f"\nBackground: {img.width}x{img.height} px at {PRINT_DPI} DPI, "
+                  f"{os.path.getsize(background) // 1024} KB (source {os.path.getsize(BACKGROUND_IMAGE) // 1024} KB)")
+
     # Create PDF
     print(f"\nGenerating PDF...")
-    c = canvas.Canvas(OUTPUT_PDF, pagesize=landscape(A4))
-
-    total_pages = (len(cards) + CARDS_PER_PAGE - 1) // CARDS_PER_PAGE
-    card_index = 0
-
-    for page_num in range(total_pages):
-        print(f"  [OK] Processing page {page_num + 1}/{total_pages}")
-
-        # Draw cards on this page (2x2 grid)
-        for row in range(CARDS_PER_COL):
-            for col in range(CARDS_PER_ROW):
-                if card_index >= len(cards):
-                    break
-
-                # Calculate position (with gaps)
-                x = GAP + (col * (CARD_WIDTH + GAP))
-                y = GAP + ((CARDS_PER_COL - 1 - row) * (CARD_HEIGHT + GAP))  # Flip Y axis
-
-                # Draw card
-                draw_card_on_pdf(
-                    c,
-                    cards[card_index],
-                    x, y,
-                    CARD_WIDTH,
-                    CARD_HEIGHT
-                )
-
-                card_index += 1
-
-        # New page if there are more cards
-        if card_index < len(cards):
-            c.showPage()
-
-    # Save PDF
-    c.save()
+    start = time.perf_counter()
+    if pages_per_file:
+        outputs = [split_output_name(i // pages_per_file + 1) for i in range(0, total_pages, pages_per_file)]
+        render_shards([(path, pages[i * pages_per_file:(i + 1) * pages_per_file])
+                       for i, path in enumerate(outputs)], series, qr_modules, workers)
+    elif workers > 1:
+        outputs = [OUTPUT_PDF]
+        shard_size = -(-total_pages // workers)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(OUTPUT_PDF))) as shard_dir:
+            shards = [(os.path.join(shard_dir, f"shard_{i // shard_size:03d}.pdf"), pages[i:i + shard_size])
+                      for i in range(0, total_pages, shard_size)]
+            render_shards(shards, series, qr_modules, workers)
+            merge_pdfs([path for path, _ in shards], OUTPUT_PDF)
+        print(f"  [OK] Merged {len(shards)} shards")
+    else:
+        outputs = [OUTPUT_PDF]
+        render_pages(OUTPUT_PDF, pages, series, qr_modules)
+    seconds = time.perf_counter() - start
 
     print("\n" + "=" * 60)
     print("SUMMARY")
     print("=" * 60)
-    print(f"[OK] Generated {total_pages} pages")
+    print(f"[OK] Generated {total_pages} pages in {seconds:.1f}s ({workers} worker{'s' if workers > 1 else ''})")
     print(f"[OK] Total cards: {len(cards)}")
-    print(f"[OK] Saved to: {OUTPUT_PDF}")
+    if QR_IDS_FILE:
+        print(f"[OK] Cards with claim QR code: {len(qr_modules)}")
+    if len(outputs) > 1:
+        print(f"[OK] Saved {len(outputs)} files: {outputs[0]} ... {outputs[-1]}")
+    else:
+        print(f"[OK] Saved to: {outputs[0]}")
     print("=" * 60)
     print("\nIl PDF è pronto per la stampa!")
-    print(f"Contiene le cartelle #{START_CARD}-#{END_CARD} (100 cartelle totali)")
-    print("4 cartelle per pagina in formato A4 landscape")
+    print(f"Contiene le cartelle {describe_ranges()} ({len(cards)} cartelle totali)")
+    if series:
+        print("Una serie completa (6 cartelle, numeri 1-90) per pagina in formato A4 verticale")
+    else:
+        print("4 cartelle per pagina in formato A4 landscape")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tombola PDF generator")
+    parser.add_argument("--series", action="store_true",
+                        help="Print one full series (6 cards) per page")
+    parser.add_argument("--input", default=CARDS_JSON_FILE,
+                        help=f"all_cards.json or binary card archive (default: {CARDS_JSON_FILE})")
+    parser.add_argument("--cards", type=parse_card_ranges,
+                        help=f"Card ranges to print, e.g. 201-350,1000-1099 (default: {START_CARD}-{END_CARD})")
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS,
+                        help=f"Processes rendering page shards, merged at the end (0 = one per CPU, default: {PDF_WORKERS})")
+    parser.add_argument("--pages-per-file", type=int, metavar="N",
+                        help="Write one PDF per N pages (name_001.pdf, ...) instead of a single file")
+    parser.add_argument("--dpi", type=int, default=PRINT_DPI,
+                        help=f"Background resolution on paper, 0 = embed the source image as is (default: {PRINT_DPI})")
+    parser.add_argument("--qr-ids", metavar="PATH",
+                        help="Print claim QR codes; card ids from an upload checkpoint or sync_cards.py --mapping")
+    args = parser.parse_args()
+    CARDS_JSON_FILE = args.input
+    CARD_RANGES = args.cards
+    QR_IDS_FILE = args.qr_ids
+    PRINT_DPI = args.dpi
+
     try:
-        generate_pdf()
+        generate_pdf(series=args.series, workers=args.workers, pages_per_file=args.pages_per_file)
     except Exception as e:
         print(f"\n[ERROR] {e}")
         import traceback
@@ -10,6 +10,9 @@ Esecuzione:
 
     O per testing backend diretto:
     python load_test.py --direct-db-test
+
+    O offline, contro il database locale simulato (supabase_standin.py):
+    python load_test.py --direct-db-test --local --latency 0.02
 """
 
 import os
@@ -153,7 +156,7 @@ if LOCUST_AVAILABLE:
 # DIRECT DATABASE TEST (test diretto su Supabase)
 # =============================================================================
 
-def direct_database_test(num_users: int = 100, spawn_rate: int = 10):
+def direct_database_test(num_users: int = 100, spawn_rate: int = 10, url: str = SUPABASE_URL):
     """
     Test diretto del database Supabase senza frontend.
     Simula claim simultanei e update.
@@ -165,9 +168,9 @@ def direct_database_test(num_users: int = 100, spawn_rate: int = 10):
     print(f"\n🧪 DIRECT DATABASE TEST")
     print(f"   Utenti: {num_users}")
     print(f"   Spawn rate: {spawn_rate}/sec")
-    print(f"   Target: {SUPABASE_URL}\n")
+    print(f"   Target: {url}\n")
 
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    supabase: Client = create_client(url, SUPABASE_ANON_KEY)
 
     # 1. Verifica cartelle disponibili
     print("📋 Verifico cartelle disponibili...")
@@ -297,14 +300,14 @@ def direct_database_test(num_users: int = 100, spawn_rate: int = 10):
 # RESET DATABASE (per ripetere i test)
 # =============================================================================
 
-def reset_database():
+def reset_database(url: str = SUPABASE_URL):
     """Reset delle cartelle per ripetere i test"""
     if not SUPABASE_AVAILABLE:
         print("❌ Supabase non disponibile")
         return
 
     print("🔄 Reset database in corso...")
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+    supabase: Client = create_client(url, SUPABASE_ANON_KEY)
 
     try:
         # Reset owner_uuid e marked_numbers
@@ -332,10 +335,29 @@ def main():
     parser.add_argument("--spawn-rate", type=int, default=10,
                        help="Utenti da spawnnare per secondo (default: 10)")
     parser.add_argument("--reset", action="store_true",
-                       help="Reset database prima del test")
+                       help="Reset database prima del test (con --local, il database locale)")
+    parser.add_argument("--local", action="store_true",
+                       help="Usa un database locale simulato invece di Supabase (con --direct-db-test)")
+    parser.add_argument("--local-cards", type=int, default=150,
+                       help="Cartelle nel database locale (default: 150)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                       help="Latenza in secondi aggiunta a ogni richiesta al database locale (default: 0)")
 
     args = parser.parse_args()
 
+    if args.local and (args.reset or args.direct_db_test):
+        from card_engine import generate_card_batch, cards_to_lists
+        from supabase_standin import SupabaseStandIn
+
+        # Il reset va al database locale, mai a quello remoto
+        with SupabaseStandIn(latency=args.latency) as standin:
+            standin.add_cards(cards_to_lists(generate_card_batch(args.local_cards)))
+            if args.reset:
+                reset_database(url=standin.url)
+            if args.direct_db_test:
+                direct_database_test(num_users=args.users, spawn_rate=args.spawn_rate, url=standin.url)
+        return
+
     if args.reset:
         reset_database()
         return
@@ -0,0 +1,53 @@
+"""
+Rebuild single cards from (seed, card_number) without the archive or the database.
+
+Works for cards generated with: python generate_unique_cards.py --counter --seed S
+
+Usage:
+    python materialize_card.py --seed 42 --card 2874
+    python materialize_card.py --seed 42 --card 2874 --card 2875 --json
+"""
+import argparse
+import json
+import sys
+
+from card_engine import materialize_cards, cards_to_lists, MAX_CARD_NUMBER
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+def materialize_card(seed, card_number):
+    """
+    Returns the card dict ({'card_number', 'numbers'}) of a counter-generated card.
+    """
+    numbers = cards_to_lists(materialize_cards(seed, [card_number]))[0]
+    return {"card_number": card_number, "numbers": numbers}
+
+def format_card(card_data):
+    """Text grid of a card, '--' for empty cells."""
+    lines = [f"Cartella #{card_data['card_number']}"]
+    for row in card_data['numbers']:
+        lines.append(" ".join(f"{num:2d}" if num is not None else "--" for num in row))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild cards from (seed, card_number)")
+    parser.add_argument("--seed", type=int, required=True,
+                        help="Master seed used with generate_unique_cards.py --counter")
+    parser.add_argument("--card", type=int, action="append", required=True,
+                        help=f"Card number (1-{MAX_CARD_NUMBER}); repeat for several cards")
+    parser.add_argument("--json", action="store_true",
+                        help="Print cards as JSON (same objects as all_cards.json)")
+    args = parser.parse_args()
+
+    cards = [materialize_card(args.seed, card_number) for card_number in args.card]
+
+    if args.json:
+        print(json.dumps(cards if len(cards) > 1 else cards[0]))
+    else:
+        print("\n\n".join(format_card(card) for card in cards))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Local stand-in for the Supabase REST API (PostgREST) of the cards table.
+
+Implements the subset of PostgREST the project uses on /rest/v1/cards:
+- GET/HEAD with select, filters (eq, neq, is, gt, gte, lt, lte, in, with
+  an optional not. prefix), order, limit, offset and Prefer: count=exact
+- PATCH (conditional update) and DELETE with the same filters, returning
+  the affected rows with Prefer: return=representation
+- POST (insert, single object or array), with on_conflict and
+  Prefer: resolution=ignore-duplicates / merge-duplicates
+
+Every request is applied under one lock, so it is atomic like a single
+statement in Postgres: of two concurrent claims of the same card
+(PATCH ...?id=eq.7&owner_uuid=is.null) exactly one gets the row back.
+A fixed latency can be added to every request, so uploads, claims and
+load tests run offline with repeatable timings.
+
+Point any script at it with SUPABASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python supabase_standin.py                              # empty table on port 54321
+    python supabase_standin.py --cards all_cards.json --latency 0.02
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# --- CONFIGURATION ---
+DEFAULT_PORT = 54321
+TABLE = "cards"
+
+# Columns of database/schema.sql and how filter values are parsed for them
+COLUMNS = {
+    "id": int,
+    "numbers": json.loads,
+    "owner_uuid": str,
+    "marked_numbers": json.loads,
+    "created_at": str,
+    "updated_at": str,
+    "fingerprint": str,
+}
+UNIQUE_COLUMNS = ("id", "fingerprint")
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class PostgrestError(Exception):
+    """Error answered with PostgREST's JSON error body."""
+
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def card_fingerprint(numbers):
+    """Same as card_fingerprint() in database/schema.sql."""
+    if not isinstance(numbers, list):
+        return None
+    cells = [cell for row in numbers if isinstance(row, list) for cell in row if cell is not None]
+    return ",".join(str(cell) for cell in sorted(cells)) if cells else None
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_list(text):
+    """Items of an in.(a,"b,c") list."""
+    if not (text.startswith("(") and text.endswith(")")):
+        raise PostgrestError(400, "PGRST100", f'"failed to parse filter (in.{text})"')
+    inner = text[1:-1]
+    return next(csv.reader([inner], skipinitialspace=True)) if inner else []
+
+
+def _parse_filter(column, expression):
+    """
+    Parse 'op.value' (or 'not.op.value') into a row predicate.
+    """
+    if column not in COLUMNS:
+        raise PostgrestError(400, "42703", f"column {TABLE}.{column} does not exist")
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+    parse = COLUMNS[column]
+
+    try:
+        if op == "is":
+            if raw not in ("null", "true", "false"):
+                raise ValueError(raw)
+            value = {"null": None, "true": True, "false": False}[raw]
+            test = lambda cell: cell is value
+        elif op == "in":
+            values = [parse(item) for item in _parse_list(raw)]
+            test = lambda cell: cell in values
+        elif op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+            value = parse(raw)
+            test = {
+                "eq": lambda cell: cell is not None and cell == value,
+                "neq": lambda cell: cell is not None and cell != value,
+                "gt": lambda cell: cell is not None and cell > value,
+                "gte": lambda cell: cell is not None and cell >= value,
+                "lt": lambda cell: cell is not None and cell < value,
+                "lte": lambda cell: cell is not None and cell <= value,
+            }[op]
+        else:
+            raise PostgrestError(400, "PGRST100", f'"failed to parse filter ({op}.{raw})"')
+    except ValueError:
+        raise PostgrestError(400, "22P02", f'invalid input syntax for {column}: "{raw}"')
+
+    return (lambda row: not test(row.get(column))) if negate else (lambda row: test(row.get(column)))
+
+
+class CardsTable:
+    """In-memory cards table; every method must be called with the lock held."""
+
+    def __init__(self):
+        self.rows = {}  # id -> row, in insertion order
+        self.by_fingerprint = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+
+    def find(self, predicates):
+        return [row for row in self.rows.values() if all(test(row) for test in predicates)]
+
+    def _check_columns(self, values):
+        for column in values:
+            if column not in COLUMNS:
+                raise PostgrestError(400, "PGRST204", f"Could not find the '{column}' column of '{TABLE}'")
+            if column == "fingerprint":
+                raise PostgrestError(400, "428C9", 'column "fingerprint" can only be updated to DEFAULT')
+
+    def insert(self, records, on_conflict=None, resolution=None):
+        """Insert records; all or nothing. Returns the inserted (or merged) rows."""
+        new_rows, merged = [], []
+        next_id = self.next_id
+        seen = {"id": set(), "fingerprint": set()}
+
+        for record in records:
+            self._check_columns(record)
+            if "numbers" not in record or record["numbers"] is None:
+                raise PostgrestError(400, "23502", 'null value in column "numbers" violates not-null constraint')
+            row = {
+                "id": record.get("id"),
+                "numbers": record["numbers"],
+                "owner_uuid": record.get("owner_uuid"),
+                "marked_numbers": record.get("marked_numbers", []),
+                "created_at": record.get("created_at") or _now(),
+                "updated_at": record.get("updated_at") or _now(),
+            }
+            row["fingerprint"] = card_fingerprint(row["numbers"])
+            if row["id"] is None:
+                while next_id in self.rows or next_id in seen["id"]:
+                    next_id += 1
+                row["id"] = next_id
+                next_id += 1
+
+            existing = self.rows.get(row["id"]) or self.by_fingerprint.get(row["fingerprint"])
+            duplicate = existing is not None or row["id"] in seen["id"] or row["fingerprint"] in seen["fingerprint"]
+            if duplicate:
+                if on_conflict in UNIQUE_COLUMNS and resolution == "ignore-duplicates":
+                    continue
+                if on_conflict in UNIQUE_COLUMNS and resolution == "merge-duplicates" and existing is not None:
+                    merged.append((existing, {k: v for k, v in record.items() if k != "id"}))
+                    continue
+                key = "cards_pkey" if row["id"] in self.rows or row["id"] in seen["id"] else "idx_cards_fingerprint"
+                raise PostgrestError(409, "23505", f'duplicate key value violates unique constraint "{key}"')
+
+            seen["id"].add(row["id"])
+            if row["fingerprint"] is not None:
+                seen["fingerprint"].add(row["fingerprint"])
+            new_rows.append(row)
+
+        for row in new_rows:
+            self.rows[row["id"]] = row
+            if row["fingerprint"] is not None:
+                self.by_fingerprint[row["fingerprint"]] = row
+        self.next_id = max(next_id, max(self.rows, default=0) + 1)
+        return new_rows + [self._apply(row, values) for row, values in merged]
+
+    def _apply(self, row, values):
+        if "numbers" in values:
+            self.by_fingerprint.pop(row["fingerprint"], None)
+        row.update(values)
+        row["updated_at"] = _now()  # update_cards_updated_at trigger
+        if "numbers" in values:
+            row["fingerprint"] = card_fingerprint(row["numbers"])
+            if row["fingerprint"] is not None:
+                self.by_fingerprint[row["fingerprint"]] = row
+        return row
+
+    def update(self, predicates, values):
+        self._check_columns(values)
+        if "id" in values:
+            raise PostgrestError(400, "428C9", 'column "id" can not be updated')
+        rows = self.find(predicates)
+        if "numbers" in values:
+            fingerprint = card_fingerprint(values["numbers"])
+            owner = self.by_fingerprint.get(fingerprint)
+            if fingerprint is not None and (len(rows) > 1 or (owner is not None and owner not in rows)):
+                raise PostgrestError(409, "23505", 'duplicate key value violates unique constraint "idx_cards_fingerprint"')
+        return [self._apply(row, values) for row in rows]
+
+    def delete(self, predicates):
+        rows = self.find(predicates)
+        for row in rows:
+            del self.rows[row["id"]]
+            self.by_fingerprint.pop(row["fingerprint"], None)
+        return rows
+
+
+def _project(rows, select):
+    if select in (None, "", "*"):
+        return [dict(row) for row in rows]
+    columns = [column.strip() for column in select.split(",")]
+    for column in columns:
+        if column not in COLUMNS:
+            raise PostgrestError(400, "42703", f"column {TABLE}.{column} does not exist")
+    return [{column: row[column] for column in columns} for row in rows]
+
+
+def _order(rows, order):
+    for term in reversed(order.split(",")):
+        column, _, direction = term.strip().partition(".")
+        if column not in COLUMNS:
+            raise PostgrestError(400, "42703", f"column {TABLE}.{column} does not exist")
+        descending = direction.startswith("desc")
+        # NULLs sort last ascending and first descending, as in Postgres
+        rows = sorted(rows, key=lambda row: (row[column] is None, row[column] if row[column] is not None else 0),
+                      reverse=descending)
+    return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "postgrest-standin"
+    # Headers and body are separate writes: without this, delayed ACKs add
+    # ~40ms to every keep-alive request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _prefer(self):
+        prefer = {}
+        for item in self.headers.get("Prefer", "").split(","):
+            name, _, value = item.strip().partition("=")
+            if name:
+                prefer[name] = value
+        return prefer
+
+    def _handle(self):
+        # Read the body first so the connection stays usable whatever happens
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        standin = self.server.standin
+        if standin.latency:
+            time.sleep(standin.latency)
+
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != f"/rest/v1/{TABLE}":
+            raise PostgrestError(404, "42P01", f'relation "public.{url.path.rsplit("/", 1)[-1]}" does not exist')
+
+        params = parse_qsl(url.query, keep_blank_values=True)
+        options = {name: value for name, value in params if name in _RESERVED_PARAMS}
+        predicates = [_parse_filter(name, value) for name, value in params if name not in _RESERVED_PARAMS]
+        prefer = self._prefer()
+        representation = prefer.get("return") == "representation"
+        table = standin.table
+
+        if self.command in ("POST", "PATCH"):
+            try:
+                values = json.loads(body or b"null")
+            except ValueError:
+                raise PostgrestError(400, "PGRST102", "Empty or invalid json")
+
+        with table.lock:
+            if self.command in ("GET", "HEAD"):
+                rows = table.find(predicates)
+                if "order" in options:
+                    rows = _order(rows, options["order"])
+                total = len(rows)
+                offset = int(options.get("offset", 0))
+                limit = int(options["limit"]) if "limit" in options else None
+                rows = rows[offset:None if limit is None else offset + limit]
+                result = _project(rows, options.get("select"))
+                first = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+                content_range = f"{first}/{total if prefer.get('count') == 'exact' else '*'}"
+                return self._send(200, result, {"Content-Range": content_range})
+
+            if self.command == "POST":
+                records = values if isinstance(values, list) else [values]
+                if not all(isinstance(record, dict) for record in records):
+                    raise PostgrestError(400, "PGRST102", "All object keys must match")
+                rows = table.insert(records, options.get("on_conflict"), prefer.get("resolution"))
+                status = 201
+            elif self.command == "PATCH":
+                if not isinstance(values, dict):
+                    raise PostgrestError(400, "PGRST102", "Empty or invalid json")
+                rows = table.update(predicates, values)
+                status = 200
+            else:
+                rows = table.delete(predicates)
+                status = 200
+            result = _project(rows, options.get("select")) if representation else None
+
+        content_range = f"0-{len(rows) - 1}/*" if rows else "*/*"
+        if representation:
+            return self._send(status, result, {"Content-Range": content_range})
+        return self._send(201 if self.command == "POST" else 204, headers={"Content-Range": content_range})
+
+    def _dispatch(self):
+        try:
+            self._handle()
+        except PostgrestError as e:
+            self._send(e.status, {"code": e.code, "details": None, "hint": None, "message": str(e)})
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _dispatch
+
+
+class SupabaseStandIn:
+    """
+    Stand-in server running in a background thread.
+
+    Usage:
+        with SupabaseStandIn(latency=0.02) as standin:
+            standin.add_cards(cards)
+            client = create_client(standin.url, "any-key")
+    """
+
+    def __init__(self, port=0, latency=0.0, host="127.0.0.1"):
+        self.latency = latency
+        self.table = CardsTable()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_cards(self, cards):
+        """Insert cards (JSON-form numbers) directly; returns their ids."""
+        with self.table.lock:
+            return [row["id"] for row in self.table.insert([{"numbers": numbers} for numbers in cards])]
+
+    @property
+    def rows(self):
+        """Copy of the table rows, in id order."""
+        with self.table.lock:
+            return [dict(row) for row in sorted(self.table.rows.values(), key=lambda row: row["id"])]
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Supabase cards API")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every request (default: 0)")
+    parser.add_argument("--cards",
+                        help="Card file to load into the table at start (all_cards.json, NDJSON or binary)")
+    args = parser.parse_args()
+
+    standin = SupabaseStandIn(args.port, args.latency)
+    if args.cards:
+        from cards import load_card_set
+        ids = standin.add_cards(load_card_set(args.cards).numbers())
+        print(f"[OK] Loaded {len(ids)} cards from {args.cards}")
+
+    print(f"[OK] Supabase stand-in listening on {standin.url} (latency {args.latency}s)")
+    print(f"     SUPABASE_URL={standin.url}")
+    try:
+        standin.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[OK] Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Sync the cards table with a local card file, by content fingerprint.
+
+Every card in the database has a fingerprint column (its numbers sorted,
+see database/add_fingerprint.sql) with a unique index. The sync reads the
+fingerprints of the database in pages, compares them with the local cards,
+inserts only the cards that are missing and reports database cards that are
+not in the local file. Existing rows are never rewritten, so their ids (and
+the QR codes printed for them) stay valid, and re-running the sync on a
+populated database only costs the fingerprint scan.
+
+Usage:
+    python sync_cards.py                           # sync all_cards.json
+    python sync_cards.py --range 201-350 --dry-run # only report differences
+    python sync_cards.py --mapping card_ids.json   # also save card_number -> id
+    python sync_cards.py --qr                      # also (re)generate QR codes
+"""
+import argparse
+import json
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from card_fingerprint import (
+    FingerprintSet, fingerprint_texts, fingerprints_from_texts, match_fingerprints
+)
+from card_store import parse_card_ranges
+from card_upload import (
+    SUPABASE_URL, SUPABASE_KEY, UPLOAD_BATCH_SIZE, UPLOAD_RETRIES, UPLOAD_BACKOFF,
+    REQUEST_TIMEOUT, RETRY_STATUSES, LOOKUP_CHUNK_SIZE, fingerprint_filter
+)
+from cards import DEFAULT_CARDS_FILE, load_card_set
+
+# Fix encoding for Windows
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+# --- CONFIGURATION ---
+PAGE_SIZE = 1000  # Rows per page of the fingerprint scan (Supabase max-rows default)
+MAX_REPORTED_EXTRAS = 20
+
+
+def _request(client, method, url, **kwargs):
+    """
+    Send a request, retrying with backoff on transport errors and RETRY_STATUSES.
+
+    Only used for reads and for inserts that ignore duplicates, which are
+    safe to resend whatever happened to the previous attempt.
+    """
+    for attempt in range(1, UPLOAD_RETRIES + 1):
+        try:
+            response = client.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+            error = f"HTTP {response.status_code}"
+        except httpx.TransportError as e:
+            error = f"{type(e).__name__}: {e}"
+
+        print(f"  [WARNING] {method} {url}: {error} (attempt {attempt}/{UPLOAD_RETRIES})")
+        if attempt < UPLOAD_RETRIES:
+            time.sleep(UPLOAD_BACKOFF * 2 ** (attempt - 1))
+    raise RuntimeError(f"{method} {url} failed after {UPLOAD_RETRIES} attempts")
+
+
+def fetch_db_fingerprints(client, page_size=PAGE_SIZE):
+    """
+    Read (id, fingerprint) of every card in the database, in id order.
+
+    Pages are keyed by the last id seen (id=gt.<last>), so every page is an
+    index range scan however deep into the table it is.
+
+    Returns:
+        tuple: ((N,) int64 ids, (N, 2) uint64 fingerprints)
+    """
+    ids, words = [], []
+    last_id = None
+    while True:
+        params = {"select": "id,fingerprint", "order": "id.asc", "limit": page_size}
+        if last_id is not None:
+            params["id"] = f"gt.{last_id}"
+        rows = _request(client, "GET", "/cards", params=params).json()
+        if not rows:
+            break
+        ids.append(np.array([row["id"] for row in rows], dtype=np.int64))
+        words.append(fingerprints_from_texts([row["fingerprint"] for row in rows]))
+        last_id = rows[-1]["id"]
+        print(f"  [OK] Scanned {sum(len(page) for page in ids)} database cards", end="\r")
+
+    print()
+    if not ids:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 2), dtype=np.uint64)
+    return np.concatenate(ids), np.concatenate(words)
+
+
+def _ids_by_fingerprint(words, rows):
+    """Database id of every fingerprint in words, taken from (id, fingerprint) rows; -1 if absent."""
+    found = match_fingerprints(words, fingerprints_from_texts([row["fingerprint"] for row in rows]))
+    row_ids = np.array([row["id"] for row in rows] + [-1], dtype=np.int64)
+    return row_ids[found]
+
+
+def insert_missing(client, numbers, words, batch_size=UPLOAD_BATCH_SIZE):
+    """
+    Insert cards, skipping any whose fingerprint is already in the database.
+
+    A skipped card is mapped to the existing row with its fingerprint. That
+    row was inserted by someone else (another sync, another event, a
+    player's claim), so the caller must not assume it owns it.
+
+    Args:
+        numbers: Cards as JSON-form nested lists
+        words: (N, 2) fingerprints of the same cards
+
+    Returns:
+        tuple: ((N,) int64 database ids of the cards, (N,) bool mask of the
+        cards mapped to an existing row instead of inserted)
+    """
+    ids = np.full(len(numbers), -1, dtype=np.int64)
+    reused = np.zeros(len(numbers), dtype=bool)
+    for start in range(0, len(numbers), batch_size):
+        batch = slice(start, start + batch_size)
+        rows = _request(
+            client, "POST", "/cards",
+            params={"on_conflict": "fingerprint", "select": "id,fingerprint"},
+            json=[{"numbers": card} for card in numbers[batch]],
+            headers={"Prefer": "return=representation,resolution=ignore-duplicates"},
+        ).json()
+
+        batch_ids = _ids_by_fingerprint(words[batch], rows)
+
+        # Cards inserted by someone else in the meantime are not returned
+        missing = batch_ids < 0
+        if missing.any():
+            texts = fingerprint_texts(words[batch][missing])
+            rows = []
+            for chunk in range(0, len(texts), LOOKUP_CHUNK_SIZE):
+                rows += _request(client, "GET", "/cards", params={
+                    "select": "id,fingerprint",
+                    "fingerprint": fingerprint_filter(texts[chunk:chunk + LOOKUP_CHUNK_SIZE]),
+                }).json()
+            batch_ids[missing] = _ids_by_fingerprint(words[batch][missing], rows)
+            reused[batch] = missing & (batch_ids >= 0)
+        ids[batch] = batch_ids
+
+        print(f"  [OK] Inserted {min(start + batch_size, len(numbers))}/{len(numbers)} cards", end="\r")
+    print()
+    return ids, reused
+
+
+def sync_cards(path=DEFAULT_CARDS_FILE, ranges=None, dry_run=False, page_size=PAGE_SIZE,
+               batch_size=UPLOAD_BATCH_SIZE, url=SUPABASE_URL, key=SUPABASE_KEY):
+    """
+    Make the database hold every card of a card file.
+
+    Args:
+        path: all_cards.json, NDJSON stream or binary card archive
+        ranges: Optional list of inclusive (start, end) card-number ranges
+        dry_run: Only compare, insert nothing
+
+    Returns:
+        dict: card_numbers, ids (database id per card, -1 if not in the
+        database), reused (cards found as an existing row when inserting
+        them, i.e. inserted by someone else after the scan), extra_ids
+        (database cards not in the local selection)
+    """
+    card_set = load_card_set(path, ranges)
+    errors = card_set.errors()
+    if errors:
+        print(f"  [ERROR] Found {len(errors)} invalid cards:")
+        for error in errors:
+            print(f"    - {error}")
+        raise ValueError("Invalid cards detected. Cannot sync.")
+
+    headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+    with httpx.Client(base_url=f"{url}/rest/v1", headers=headers, timeout=REQUEST_TIMEOUT) as client:
+        print(f"\nComparing {len(card_set)} local cards from {path} with the database...")
+        db_ids, db_words = fetch_db_fingerprints(client, page_size)
+
+        local = card_set.fingerprints
+        ids = np.append(db_ids, -1)[match_fingerprints(local, db_words)]
+        extra_ids = db_ids[~FingerprintSet(local).contains(db_words)]
+
+        missing = np.flatnonzero(ids < 0)
+        reused = np.zeros(len(card_set), dtype=bool)
+        print(f"  [OK] {len(card_set) - len(missing)} cards already in the database (left untouched)")
+        print(f"  [OK] {len(missing)} cards missing from the database")
+
+        if len(missing) and not dry_run:
+            numbers = card_set[missing].numbers()
+            ids[missing], reused[missing] = insert_missing(client, numbers, local[missing], batch_size)
+            not_inserted = int((ids < 0).sum())
+            if not_inserted:
+                print(f"  [ERROR] {not_inserted} cards could not be inserted")
+            else:
+                print(f"  [OK] Inserted {len(missing) - int(reused.sum())} cards")
+            if reused.any():
+                count = int(reused.sum())
+                shown = ", ".join(str(n) for n in card_set.card_numbers[reused][:MAX_REPORTED_EXTRAS].tolist())
+                more = f" (+{count - MAX_REPORTED_EXTRAS} more)" if count > MAX_REPORTED_EXTRAS else ""
+                print(f"  [WARNING] {count} cards were inserted by someone else during the sync and mapped "
+                      f"to their rows: cards {shown}{more}")
+
+    if len(extra_ids):
+        shown = ", ".join(str(i) for i in extra_ids[:MAX_REPORTED_EXTRAS].tolist())
+        more = f" (+{len(extra_ids) - MAX_REPORTED_EXTRAS} more)" if len(extra_ids) > MAX_REPORTED_EXTRAS else ""
+        print(f"  [WARNING] {len(extra_ids)} database cards are not in the local selection: ids {shown}{more}")
+
+    return {"card_numbers": card_set.card_numbers, "ids": ids, "reused": reused, "extra_ids": extra_ids}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insert missing cards into the database, by fingerprint")
+    parser.add_argument("--input", default=DEFAULT_CARDS_FILE,
+                        help=f"Card file: all_cards.json, NDJSON or binary archive (default: {DEFAULT_CARDS_FILE})")
+    parser.add_argument("--range", dest="ranges", type=parse_card_ranges,
+                        help="Only sync these card numbers, e.g. 201-350 or 1-50,101-150")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report missing and extra cards")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help=f"Rows per page of the database scan (default: {PAGE_SIZE})")
+    parser.add_argument("--batch-size", type=int, default=UPLOAD_BATCH_SIZE,
+                        help=f"Cards per insert request (default: {UPLOAD_BATCH_SIZE})")
+    parser.add_argument("--mapping",
+                        help="Save card_number -> database id as JSON to this file")
+    parser.add_argument("--qr", action="store_true",
+                        help="Generate QR codes for the database ids of the synced cards")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("TOMBOLA CARD SYNC")
+    print("=" * 60)
+
+    result = sync_cards(args.input, args.ranges, args.dry_run, args.page_size, args.batch_size)
+    synced = result["ids"] >= 0
+    if result["reused"].any() and (args.mapping or args.qr):
+        # Their rows may belong to another event or a player: no mapping or QR code for them
+        print(f"[WARNING] Leaving out {int(result['reused'].sum())} cards mapped to rows inserted by someone else")
+        synced &= ~result["reused"]
+
+    if args.mapping:
+        mapping = dict(zip(result["card_numbers"][synced].tolist(), result["ids"][synced].tolist()))
+        with open(args.mapping, 'w', encoding='utf-8') as f:
+            json.dump(mapping, f, indent=2)
+        print(f"[OK] Saved {len(mapping)} card ids to {args.mapping}")
+
+    if args.qr and synced.any():
+        from generate_unique_cards import generate_qr_codes
+        generate_qr_codes(result["ids"][synced].tolist())
+
+    if not args.dry_run and (result["ids"] < 0).any():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
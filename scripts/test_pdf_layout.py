@@ -1,9 +1,10 @@
-import json
 import sys
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 
+from cards import load_card_set
+
 # Fix encoding for Windows
 if sys.platform == 'win32':
     import io
@@ -29,11 +30,9 @@ GRID_COLS = 7
 def load_test_card():
     """Load first card for testing."""
     print(f"Loading test card from {CARDS_JSON_FILE}...")
-    with open(CARDS_JSON_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
 
     # Use first card
-    return data['cards'][0]
+    return load_card_set(CARDS_JSON_FILE)[:1].card_dicts()[0]
 
 def draw_card_with_config(c, card_data, x, y, width, height, config):
     """Draw card with specific margin configuration."""
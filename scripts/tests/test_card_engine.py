@@ -0,0 +1,208 @@
+import numpy as np
+import pytest
+
+import card_engine
+from card_engine import (
+    MAX_CARD_NUMBER, SERIES_SIZE, TOTAL_NUMBER_SETS, TOTAL_VALID_CARDS, _FEISTEL_HALF_BITS,
+    _FEISTEL_HALF_MASK, _counter_keys, _feistel, _permute_set_ranks, generate_card_batch,
+    generate_overlap_bounded_cards, generate_series, generate_unique_series, materialize_cards, number_set_ranks, rank_cards,
+    sample_unique_cards, stream_unique_cards, unrank_cards, unrank_number_sets
+)
+from card_fingerprint import fingerprint_bits, fingerprint_words, first_occurrences, mix64
+from card_validation import validate_cards
+
+
+def test_rank_unrank_round_trip():
+    cards = generate_card_batch(5000, np.random.default_rng(1))
+    ranks = rank_cards(cards)
+    assert ranks.min() >= 0 and ranks.max() < TOTAL_VALID_CARDS
+    np.testing.assert_array_equal(unrank_cards(ranks), cards)
+
+
+@pytest.mark.parametrize("ranks", [
+    [0, 1, 2, TOTAL_VALID_CARDS - 2, TOTAL_VALID_CARDS - 1],
+    np.random.default_rng(2).integers(0, TOTAL_VALID_CARDS, 5000),
+])
+def test_unrank_rank_round_trip(ranks):
+    cards = unrank_cards(ranks)
+    assert validate_cards(cards)[0].all()
+    np.testing.assert_array_equal(rank_cards(cards), ranks)
+
+
+def test_distinct_ranks_give_distinct_cards():
+    cards = unrank_cards(np.arange(100_000))
+    assert len(np.unique(cards.reshape(len(cards), -1), axis=0)) == len(cards)
+
+
+def test_number_set_ranks_round_trip():
+    set_ranks = np.random.default_rng(3).integers(0, TOTAL_NUMBER_SETS, 5000)
+    cards = unrank_number_sets(set_ranks, np.random.default_rng(4))
+    assert validate_cards(cards)[0].all()
+    np.testing.assert_array_equal(number_set_ranks(cards), set_ranks)
+
+
+def test_number_set_rank_ignores_layout():
+    set_ranks = np.random.default_rng(5).integers(0, TOTAL_NUMBER_SETS, 1000)
+    a = unrank_number_sets(set_ranks, np.random.default_rng(6))
+    b = unrank_number_sets(set_ranks, np.random.default_rng(7))
+    assert (rank_cards(a) != rank_cards(b)).any()
+    np.testing.assert_array_equal(number_set_ranks(a), number_set_ranks(b))
+
+
+def test_sample_unique_cards_are_unique_and_valid():
+    cards = sample_unique_cards(20_000, np.random.default_rng(8))
+    assert validate_cards(cards)[0].all()
+    assert len(np.unique(number_set_ranks(cards))) == len(cards)
+
+
+def _feistel_inverse(values, round_keys):
+    half = np.uint64(_FEISTEL_HALF_BITS)
+    left, right = values >> half, values & _FEISTEL_HALF_MASK
+    for key in round_keys[::-1]:
+        left, right = right ^ (mix64(left ^ key) & _FEISTEL_HALF_MASK), left
+    return (left << half) | right
+
+
+def test_feistel_is_invertible():
+    round_keys, _ = _counter_keys(42)
+    values = np.random.default_rng(9).integers(0, 1 << (2 * _FEISTEL_HALF_BITS), 100_000, dtype=np.uint64)
+    permuted = _feistel(values, round_keys)
+    assert (permuted >> np.uint64(2 * _FEISTEL_HALF_BITS) == 0).all()
+    np.testing.assert_array_equal(_feistel_inverse(permuted, round_keys), values)
+
+
+def test_permuted_set_ranks_are_distinct_and_in_range():
+    round_keys, _ = _counter_keys(42)
+    indices = np.concatenate([np.arange(100_000), np.arange(TOTAL_NUMBER_SETS - 1000, TOTAL_NUMBER_SETS)])
+    ranks = _permute_set_ranks(indices.astype(np.uint64), round_keys)
+    assert ranks.min() >= 0 and ranks.max() < TOTAL_NUMBER_SETS
+    assert len(np.unique(ranks)) == len(ranks)
+
+
+def test_materialize_cards_is_random_access():
+    card_numbers = np.arange(1, 20_001)
+    cards = materialize_cards(7, card_numbers)
+    assert validate_cards(cards)[0].all()
+    assert len(np.unique(number_set_ranks(cards))) == len(cards)
+
+    # Any card is rebuilt on its own, in any order
+    picked = np.random.default_rng(10).permutation(card_numbers)[:500]
+    np.testing.assert_array_equal(materialize_cards(7, picked), cards[picked - 1])
+    assert validate_cards(materialize_cards(7, [1, MAX_CARD_NUMBER]))[0].all()
+
+
+def test_materialize_cards_depends_on_seed():
+    a, b = materialize_cards(1, np.arange(1, 1001)), materialize_cards(2, np.arange(1, 1001))
+    assert (number_set_ranks(a) != number_set_ranks(b)).mean() > 0.99
+
+
+@pytest.mark.parametrize("card_number", [0, MAX_CARD_NUMBER + 1])
+def test_materialize_cards_rejects_out_of_range_numbers(card_number):
+    with pytest.raises(ValueError):
+        materialize_cards(1, [card_number])
+
+
+def _assert_full_series(series):
+    """Every series uses each number 1-90 exactly once, on 6 valid cards."""
+    numbers = np.sort(series.reshape(len(series), -1), axis=1)
+    numbers = numbers[:, numbers.shape[1] - 90:]
+    np.testing.assert_array_equal(numbers, np.broadcast_to(np.arange(1, 91), numbers.shape))
+    assert (series > 0).sum(axis=(2, 3)).tolist() == [[15] * SERIES_SIZE] * len(series)
+    assert validate_cards(series.reshape(-1, 3, 7))[0].all()
+
+
+def test_generate_series_covers_1_to_90():
+    series = generate_series(2000, np.random.default_rng(11))
+    assert series.shape == (2000, SERIES_SIZE, 3, 7)
+    _assert_full_series(series)
+
+
+def test_generate_unique_series_are_distinct():
+    series = generate_unique_series(1000, seed=12)
+    _assert_full_series(series)
+    words = fingerprint_words(series.reshape(-1, 3, 7))
+    assert len(first_occurrences(words)) == len(words)
+    np.testing.assert_array_equal(generate_unique_series(1000, seed=12), series)
+
+
+def test_generate_unique_series_replaces_repeated_series(monkeypatch):
+    calls = []
+
+    def generate(num_series, rng):
+        series = generate_series(num_series, rng)
+        if not calls:
+            series[1::2] = series[0::2]  # Every other series repeats the one before it
+        calls.append(num_series)
+        return series
+    monkeypatch.setattr(card_engine, "generate_series", generate)
+
+    series = generate_unique_series(10, seed=13)
+    assert calls == [10, 5]
+    _assert_full_series(series)
+    words = fingerprint_words(series.reshape(-1, 3, 7))
+    assert len(first_occurrences(words)) == len(words)
+
+
+def _max_pairwise_overlap(cards):
+    bits = fingerprint_bits(fingerprint_words(cards))
+    shared = bits @ bits.T
+    np.fill_diagonal(shared, 0)
+    return int(shared.max())
+
+
+@pytest.mark.parametrize("max_overlap, num_cards", [(3, 15), (6, 1000), (9, 1500)])
+def test_overlap_bounded_cards_share_at_most_max_overlap(max_overlap, num_cards):
+    cards = generate_overlap_bounded_cards(num_cards, max_overlap, seed=14)
+    assert len(cards) == num_cards
+    assert validate_cards(cards)[0].all()
+    assert _max_pairwise_overlap(cards) <= max_overlap
+
+
+def test_overlap_bounded_cards_unreachable_count():
+    # Cards sharing no number use 15 of the 90 numbers each: at most 6 of them
+    with pytest.raises(ValueError, match="share at most 0 numbers"):
+        generate_overlap_bounded_cards(10, 0, seed=15)
+
+    cards = generate_overlap_bounded_cards(10, 0, seed=15, allow_partial=True)
+    assert 1 <= len(cards) <= 6
+    assert validate_cards(cards)[0].all()
+    assert _max_pairwise_overlap(cards) == 0
+
+
+@pytest.mark.parametrize("max_overlap", [-1, 15])
+def test_overlap_bounded_cards_rejects_invalid_bound(max_overlap):
+    with pytest.raises(ValueError, match="max_overlap"):
+        generate_overlap_bounded_cards(10, max_overlap)
+
+
+def test_stream_unique_cards_are_unique_across_chunks():
+    chunks = list(stream_unique_cards(50_000, chunk_size=7000, seed=16))
+    assert all(0 < len(chunk) <= 7000 for chunk in chunks)
+    cards = np.concatenate(chunks)
+    assert len(cards) == 50_000
+    assert validate_cards(cards)[0].all()
+    assert len(np.unique(number_set_ranks(cards))) == len(cards)
+    np.testing.assert_array_equal(np.concatenate(list(stream_unique_cards(50_000, chunk_size=7000, seed=16))),
+                                  cards)
+
+
+def test_stream_unique_cards_drops_cards_seen_in_earlier_chunks(monkeypatch):
+    repeated = sample_unique_cards(100, np.random.default_rng(17))
+    calls = []
+
+    def sample(n, rng):
+        calls.append(n)
+        # The second chunk repeats the first one entirely, the third half of it
+        if len(calls) <= 2:
+            return repeated
+        if len(calls) == 3:
+            return np.concatenate([repeated[:50], sample_unique_cards(50, rng)])
+        return sample_unique_cards(n, rng)
+    monkeypatch.setattr(card_engine, "sample_unique_cards", sample)
+
+    chunks = list(stream_unique_cards(300, chunk_size=100, seed=18))
+    assert calls[:3] == [100, 100, 100]
+    assert [len(chunk) for chunk in chunks[:2]] == [100, 50]
+    cards = np.concatenate(chunks)
+    assert len(cards) == 300
+    assert len(np.unique(number_set_ranks(cards))) == len(cards)
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from card_engine import cards_to_lists, generate_card_batch
+from generate_card_images import CardImageTemplate, card_image_filename, render_card_images
+
+
+@pytest.fixture(scope="module")
+def cards():
+    numbers = cards_to_lists(generate_card_batch(3, np.random.default_rng(1)))
+    return [{"card_number": i + 201, "numbers": card} for i, card in enumerate(numbers)]
+
+
+@pytest.mark.parametrize("fmt", ["webp", "png"])
+def test_render_card_images(tmp_path, cards, fmt):
+    result = render_card_images(cards, str(tmp_path), width=400, fmt=fmt, workers=1)
+    assert result["rendered"] == len(cards) and result["errors"] == []
+    for card_data in cards:
+        with Image.open(card_image_filename(str(tmp_path), card_data["card_number"], fmt)) as img:
+            assert img.width == 400
+
+
+def test_missing_font_fails_loudly(tmp_path, cards):
+    missing = str(tmp_path / "missing.ttf")
+    with pytest.raises(ValueError, match="Cannot load font"):
+        render_card_images(cards, str(tmp_path), fmt="webp", workers=1, font=missing)
+    with pytest.raises(ValueError):
+        CardImageTemplate(font=missing)
+    assert not any(name.startswith("card_") for name in os.listdir(str(tmp_path)))
@@ -0,0 +1,85 @@
+import io
+import os
+
+import numpy as np
+import pytest
+import qrcode
+from PIL import Image
+
+from card_qr import MATRIX_FILE, QRTemplate, card_url, qr_filename, render_qr_codes
+
+BASE_URL = "https://tombola.example.app"
+CARD_IDS = [0, 7, 42, 99, 100, 123, 4096, 99_999, 100_000, 654_321]
+
+
+def _reference_modules(template, card_id):
+    """Module matrix built by the qrcode library itself, with the template's version and mask."""
+    qr = qrcode.QRCode(version=template.version, error_correction=template.error_correction,
+                       mask_pattern=template.mask_pattern, border=0)
+    qr.add_data(card_url(BASE_URL, card_id))
+    qr.make(fit=False)
+    return np.array(qr.modules, dtype=bool)
+
+
+@pytest.fixture(scope="module")
+def template():
+    return QRTemplate(BASE_URL, 6)
+
+
+def test_modules_match_the_qrcode_library(template):
+    modules = template.modules(CARD_IDS)
+    assert modules.shape == (len(CARD_IDS), template.size, template.size)
+    assert template.size == 4 * template.version + 17
+    for card_id, card_modules in zip(CARD_IDS, modules):
+        np.testing.assert_array_equal(card_modules, _reference_modules(template, card_id), err_msg=str(card_id))
+
+
+@pytest.mark.parametrize("mask_pattern", range(8))
+def test_every_mask_matches_the_qrcode_library(mask_pattern):
+    template = QRTemplate(BASE_URL, 4, mask_pattern=mask_pattern)
+    for card_id, card_modules in zip([5, 1234], template.modules([5, 1234])):
+        np.testing.assert_array_equal(card_modules, _reference_modules(template, card_id))
+
+
+def test_png_matches_the_qrcode_image(template):
+    # Version and mask are fixed per template, so compare against qrcode with the same settings
+    card_id = 4096
+    qr = qrcode.QRCode(version=template.version, error_correction=template.error_correction,
+                       mask_pattern=template.mask_pattern)
+    qr.add_data(card_url(BASE_URL, card_id))
+    qr.make(fit=False)
+    expected = np.array(qr.make_image().get_image().convert("L"))
+
+    modules = template.modules([card_id])[0]
+    png = np.array(Image.open(io.BytesIO(template.png(modules))).convert("L"))
+    np.testing.assert_array_equal(png, expected)
+    np.testing.assert_array_equal(np.array(template.image(modules).convert("L")), expected)
+
+
+def test_ids_longer_than_the_template_are_rejected(template):
+    with pytest.raises(ValueError):
+        template.codewords([1_234_567])
+
+
+@pytest.mark.parametrize("fmt", ["png", "svg", "matrix"])
+def test_render_qr_codes(tmp_path, fmt):
+    card_ids = [1, 22, 333]
+    result = render_qr_codes(card_ids, BASE_URL, str(tmp_path), workers=1, fmt=fmt)
+    assert result["rendered"] == len(card_ids) and result["errors"] == []
+    if fmt == "matrix":
+        with np.load(os.path.join(str(tmp_path), MATRIX_FILE)) as data:
+            size = int(data["size"])
+            modules = np.unpackbits(data["modules"], axis=1)[:, :size * size].reshape(-1, size, size)
+            template = QRTemplate(BASE_URL, 3)
+            assert data["card_ids"].tolist() == card_ids
+            np.testing.assert_array_equal(modules.astype(bool), template.modules(card_ids))
+    else:
+        assert all(os.path.exists(qr_filename(str(tmp_path), card_id, fmt)) for card_id in card_ids)
+
+
+@pytest.mark.parametrize("fmt", ["png", "matrix"])
+def test_generate_qr_codes_returns_the_rendered_count(tmp_path, monkeypatch, fmt):
+    import generate_unique_cards
+    monkeypatch.setattr(generate_unique_cards, "OUTPUT_DIR", str(tmp_path))
+    # Uploads that failed have no id and get no QR code
+    assert generate_unique_cards.generate_qr_codes([5, None, 6], workers=1, fmt=fmt) == 2
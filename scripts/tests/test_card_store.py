@@ -0,0 +1,178 @@
+import json
+
+import numpy as np
+import pytest
+
+from card_engine import cards_to_lists, generate_card_batch, stream_unique_cards
+from card_store import (
+    HEADER_SIZE, RECORD_SIZE, CardArchive, binary_to_json, iter_binary, iter_json_cards, iter_ndjson,
+    json_to_binary, merge_card_ranges, parse_card_ranges, read_binary_header, select_json_cards,
+    write_binary, write_card_archive, write_card_stream, write_ndjson
+)
+
+
+@pytest.fixture(scope="module")
+def cards():
+    return generate_card_batch(1000, np.random.default_rng(1))
+
+
+def _write_json(path, card_numbers, cards, series_size=0):
+    card_dicts = [{"card_number": n, "numbers": numbers}
+                  for n, numbers in zip(card_numbers, cards_to_lists(cards))]
+    if series_size:
+        for i, card_data in enumerate(card_dicts):
+            card_data["series"] = i // series_size + 1
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"total_cards": len(card_dicts), "cards": card_dicts}, f, indent=2)
+    return card_dicts
+
+
+def test_ndjson_round_trip(tmp_path, cards):
+    path = str(tmp_path / "cards.ndjson")
+    assert write_ndjson(path, np.array_split(cards, 7), first_card_number=11) == len(cards)
+    card_dicts = list(iter_ndjson(path))
+    assert [card_data["card_number"] for card_data in card_dicts] == list(range(11, 11 + len(cards)))
+    assert [card_data["numbers"] for card_data in card_dicts] == cards_to_lists(cards)
+
+
+def test_binary_stream_round_trip(tmp_path, cards):
+    path = str(tmp_path / "cards.bin")
+    assert write_binary(path, np.array_split(cards, 7), first_card_number=11) == len(cards)
+    with open(path, 'rb') as f:
+        assert read_binary_header(f) == (11, len(cards), True)
+    chunks = list(iter_binary(path, chunk_size=300))
+    assert [first for first, _ in chunks] == [11, 311, 611, 911]
+    np.testing.assert_array_equal(np.concatenate([chunk for _, chunk in chunks]), cards)
+
+
+@pytest.mark.parametrize("name", ["cards.ndjson", "cards.jsonl", "cards.bin"])
+def test_write_card_stream(tmp_path, name):
+    path = str(tmp_path / name)
+    cards = np.concatenate(list(stream_unique_cards(2500, chunk_size=1000, seed=3)))
+    assert write_card_stream(path, stream_unique_cards(2500, chunk_size=1000, seed=3), first_card_number=5) == 2500
+    if name.endswith(".bin"):
+        chunks = list(iter_binary(path))
+        assert chunks[0][0] == 5
+        np.testing.assert_array_equal(np.concatenate([chunk for _, chunk in chunks]), cards)
+    else:
+        card_dicts = list(iter_ndjson(path))
+        assert [card_data["card_number"] for card_data in card_dicts] == list(range(5, 2505))
+        assert [card_data["numbers"] for card_data in card_dicts] == cards_to_lists(cards)
+
+
+def test_write_card_stream_rejects_unknown_extension(tmp_path, cards):
+    with pytest.raises(ValueError, match="extension"):
+        write_card_stream(str(tmp_path / "cards.csv"), [cards])
+    assert not (tmp_path / "cards.csv").exists()
+
+
+def test_unfinished_binary_file_yields_complete_records(tmp_path, cards):
+    path = str(tmp_path / "cards.bin")
+    write_binary(path, [cards])
+    # A writer that stopped mid-record, before marking the file complete
+    with open(path, 'r+b') as f:
+        f.truncate(HEADER_SIZE + 10 * RECORD_SIZE + 5)
+        f.seek(0)
+        header = bytearray(f.read(HEADER_SIZE))
+        header[8] = 0  # flags (little-endian uint32 after magic, version and record size)
+        f.seek(0)
+        f.write(header)
+    with open(path, 'rb') as f:
+        assert read_binary_header(f)[2] is False
+    np.testing.assert_array_equal(np.concatenate([chunk for _, chunk in iter_binary(path)]), cards[:10])
+    with CardArchive(path) as archive:
+        assert len(archive) == 10
+
+
+def test_contiguous_archive(tmp_path, cards):
+    path = str(tmp_path / "cards.bin")
+    write_card_archive(path, np.arange(201, 201 + len(cards)), cards, series_size=6)
+    with CardArchive(path) as archive:
+        assert len(archive) == len(cards)
+        card_numbers, selected = archive.select(300, 349)
+        assert card_numbers.tolist() == list(range(300, 350))
+        np.testing.assert_array_equal(selected, cards[99:149])
+        np.testing.assert_array_equal(archive.card(201), cards[0])
+        assert archive.select(2000, 3000)[0].tolist() == []
+        assert archive.card_dicts(206, 207)[1]["series"] == 2
+        with pytest.raises(KeyError):
+            archive.card(200)
+
+
+@pytest.mark.parametrize("order", ["sorted", "shuffled"])
+def test_indexed_archive(tmp_path, cards, order):
+    card_numbers = np.sort(np.random.default_rng(2).choice(10_000, len(cards), replace=False)) + 1
+    if order == "shuffled":
+        card_numbers = np.random.default_rng(3).permutation(card_numbers)
+    path = str(tmp_path / "cards.bin")
+    write_card_archive(path, card_numbers, cards)
+    with CardArchive(path) as archive:
+        np.testing.assert_array_equal(archive.card_numbers, card_numbers)
+        selected_numbers, selected = archive.select(2000, 5000)
+        keep = (card_numbers >= 2000) & (card_numbers <= 5000)
+        assert sorted(selected_numbers.tolist()) == sorted(card_numbers[keep].tolist())
+        np.testing.assert_array_equal(selected, cards[np.isin(card_numbers, selected_numbers)])
+        np.testing.assert_array_equal(archive.card(int(card_numbers[5])), cards[5])
+
+
+@pytest.mark.parametrize("card_numbers, series_size", [
+    (np.arange(1, 1001), 0),
+    (np.arange(1, 1001), 8),
+    (np.arange(1, 2001, 2), 0),
+])
+def test_json_binary_json_round_trip(tmp_path, cards, card_numbers, series_size):
+    json_path, bin_path, back_path = (str(tmp_path / name) for name in ("a.json", "a.bin", "b.json"))
+    card_dicts = _write_json(json_path, card_numbers.tolist(), cards, series_size)
+    assert json_to_binary(json_path, bin_path) == len(cards)
+    assert binary_to_json(bin_path, back_path) == len(cards)
+    with open(back_path, 'r', encoding='utf-8') as f:
+        assert json.load(f)["cards"] == card_dicts
+
+
+@pytest.fixture(scope="module", params=["indented", "compact"])
+def json_file(tmp_path_factory, cards, request):
+    path = str(tmp_path_factory.mktemp("json") / "all_cards.json")
+    card_dicts = _write_json(path, range(1, 201), cards[:200], series_size=6)
+    if request.param == "compact":
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"total_cards": len(card_dicts), "cards": card_dicts}, f, separators=(",", ":"))
+    return path, card_dicts
+
+
+# Chunks shorter than a key, than a card object, and larger than the file
+CHUNK_SIZES = [1, 7, 64, 333, 4096, 1 << 20]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_iter_json_cards_chunk_boundaries(json_file, chunk_size):
+    path, card_dicts = json_file
+    assert list(iter_json_cards(path, chunk_size)) == card_dicts
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("ranges", [
+    [(1, 1)], [(200, 200)], [(50, 120)], [(10, 20), (15, 30), (199, 500)],
+    [(100, 110), (1, 3)], [(300, 400)],
+])
+def test_select_json_cards_chunk_boundaries(json_file, chunk_size, ranges):
+    path, card_dicts = json_file
+    expected = [card_data for card_data in card_dicts
+                if any(start <= card_data["card_number"] <= end for start, end in ranges)]
+    assert select_json_cards(path, ranges, chunk_size) == expected
+
+
+def test_select_json_cards_stops_after_the_last_range(tmp_path, cards):
+    path = str(tmp_path / "all_cards.json")
+    card_dicts = _write_json(path, range(1, len(cards) + 1), cards)
+    # Nothing past the selected cards is read, so a damaged tail does not matter
+    with open(path, 'r+', encoding='utf-8') as f:
+        f.seek(len(f.read()) // 2)
+        f.truncate()
+    assert select_json_cards(path, [(1, 100)], chunk_size=4096) == card_dicts[:100]
+
+
+def test_card_ranges():
+    assert parse_card_ranges("201-350, 1000-1099,2000") == [(201, 350), (1000, 1099), (2000, 2000)]
+    assert merge_card_ranges([(10, 20), (1, 5), (6, 8), (15, 30)]) == [(1, 8), (10, 30)]
+    with pytest.raises(ValueError):
+        parse_card_ranges("350-201")
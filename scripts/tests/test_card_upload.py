@@ -0,0 +1,168 @@
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from card_engine import cards_from_lists, cards_to_lists, generate_card_batch
+from card_fingerprint import fingerprint_texts, fingerprint_words, fingerprints_from_texts
+from card_upload import CHECKPOINT_SUFFIX, UploadCheckpoint, read_card_ids, upload_card_file
+from cards import file_hash
+from sync_cards import insert_missing, sync_cards
+from supabase_standin import SupabaseStandIn
+
+
+@pytest.fixture
+def standin():
+    with SupabaseStandIn() as standin:
+        yield standin
+
+
+@pytest.fixture
+def card_file(tmp_path):
+    path = str(tmp_path / "all_cards.json")
+    numbers = cards_to_lists(generate_card_batch(250, np.random.default_rng(1)))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"total_cards": len(numbers), "cards": [
+            {"card_number": i + 1, "numbers": card} for i, card in enumerate(numbers)
+        ]}, f)
+    return path, numbers
+
+
+def _upload(path, standin, **kwargs):
+    kwargs.setdefault("batch_size", 40)
+    return upload_card_file(path, url=standin.url, key="test", **kwargs)
+
+
+def _db_ids(standin, numbers):
+    ids = {json.dumps(row["numbers"]): row["id"] for row in standin.rows}
+    return [ids.get(json.dumps(card)) for card in numbers]
+
+
+def test_checkpoint_resume(tmp_path):
+    path = str(tmp_path / "upload.ndjson")
+    checkpoint = UploadCheckpoint(path, "hash-a")
+    checkpoint.mark_pending([1, 2, 3])
+    checkpoint.record([1, 2, 3], [10, 20, 30])
+    checkpoint.mark_pending([4, 5])
+    checkpoint.close()
+
+    checkpoint = UploadCheckpoint(path, "hash-a")
+    assert checkpoint.ids == {1: 10, 2: 20, 3: 30}
+    assert checkpoint.pending == {4, 5}
+    checkpoint.record([4], [40])
+    checkpoint.close()
+    assert read_card_ids(path) == {1: 10, 2: 20, 3: 30, 4: 40}
+
+    with pytest.raises(ValueError):
+        UploadCheckpoint(path, "hash-b")
+    checkpoint = UploadCheckpoint(path, "hash-b", restart=True)
+    assert checkpoint.ids == {} and checkpoint.pending == set()
+    checkpoint.close()
+
+
+def test_read_card_ids_from_mapping(tmp_path):
+    path = str(tmp_path / "mapping.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"1": 5, "2": 7}, f)
+    assert read_card_ids(path) == {1: 5, 2: 7}
+
+
+def test_upload_resumes_without_resending(card_file, standin):
+    path, numbers = card_file
+    card_numbers, ids = _upload(path, standin, ranges=[(1, 100)])
+    assert card_numbers == list(range(1, 101))
+    assert ids == _db_ids(standin, numbers[:100])
+
+    card_numbers, ids = _upload(path, standin)
+    assert card_numbers == list(range(1, 251))
+    assert len(standin.rows) == len(numbers)
+    assert ids == _db_ids(standin, numbers)
+
+
+def test_pending_batches_are_looked_up_before_resending(card_file, standin):
+    path, numbers = card_file
+    # A previous run committed cards #1-#120 but crashed before recording them
+    standin.add_cards(numbers[:120])
+    checkpoint = UploadCheckpoint(path + CHECKPOINT_SUFFIX, file_hash(path))
+    checkpoint.mark_pending(list(range(1, 161)))
+    checkpoint.close()
+
+    _, ids = _upload(path, standin)
+    assert len(standin.rows) == len(numbers)
+    assert ids == _db_ids(standin, numbers)
+    assert ids[:120] == list(range(1, 121))
+
+
+def test_fingerprint_texts_match_the_database(standin):
+    numbers = cards_to_lists(generate_card_batch(50, np.random.default_rng(2)))
+    standin.add_cards(numbers)
+    words = fingerprint_words(cards_from_lists(numbers))
+    texts = [row["fingerprint"] for row in standin.rows]
+    assert fingerprint_texts(words) == texts
+    np.testing.assert_array_equal(fingerprints_from_texts(texts), words)
+
+
+def test_rerun_maps_cards_to_their_existing_ids(card_file, standin):
+    path, numbers = card_file
+    _, first = _upload(path, standin, restart=True)
+    _, second = _upload(path, standin, restart=True)
+    assert second == first == _db_ids(standin, numbers)
+    assert len(standin.rows) == len(numbers)
+
+
+def test_cards_inserted_by_someone_else_are_not_duplicated(card_file, standin):
+    path, numbers = card_file
+    standin.add_cards(numbers[50:80])
+    _, ids = _upload(path, standin)
+    assert len(standin.rows) == len(numbers)
+    assert ids[50:80] == list(range(1, 31))
+    assert ids == _db_ids(standin, numbers)
+
+
+def test_insert_missing_looks_up_skipped_cards_in_chunks(standin):
+    numbers = cards_to_lists(generate_card_batch(250, np.random.default_rng(3)))
+    words = fingerprint_words(cards_from_lists(numbers))
+    # Inserted between the fingerprint scan and the insert: all skipped
+    existing = standin.add_cards(numbers)
+
+    lookups = []
+    with httpx.Client(base_url=f"{standin.url}/rest/v1",
+                      event_hooks={"request": [lookups.append]}) as client:
+        ids, reused = insert_missing(client, numbers, words, batch_size=250)
+    assert ids.tolist() == existing and reused.all()
+
+    in_filters = [request.url.params["fingerprint"] for request in lookups if request.method == "GET"]
+    assert [text.count('"') // 2 for text in in_filters] == [100, 100, 50]
+
+
+def test_sync_cards_inserts_only_missing_cards(card_file, standin):
+    path, numbers = card_file
+    standin.add_cards(numbers[:100] + cards_to_lists(generate_card_batch(5, np.random.default_rng(4))))
+
+    result = sync_cards(path, dry_run=True, url=standin.url, key="test")
+    assert (result["ids"] < 0).sum() == 150 and len(standin.rows) == 105
+
+    result = sync_cards(path, url=standin.url, key="test")
+    assert result["ids"].tolist() == _db_ids(standin, numbers)
+    assert result["ids"][:100].tolist() == list(range(1, 101))
+    assert result["extra_ids"].tolist() == [101, 102, 103, 104, 105]
+    assert not result["reused"].any()
+    assert len(standin.rows) == 255
+
+
+def test_sync_cards_reports_cards_inserted_during_the_sync(card_file, standin, monkeypatch, capsys):
+    import sync_cards as sync_module
+    path, numbers = card_file
+    fetch = sync_module.fetch_db_fingerprints
+
+    def fetch_then_race(client, page_size):
+        scanned = fetch(client, page_size)
+        standin.add_cards(numbers[10:15])  # Another run inserts these after the scan
+        return scanned
+    monkeypatch.setattr(sync_module, "fetch_db_fingerprints", fetch_then_race)
+
+    result = sync_cards(path, url=standin.url, key="test")
+    assert result["ids"].tolist() == _db_ids(standin, numbers)
+    assert np.flatnonzero(result["reused"]).tolist() == list(range(10, 15))
+    assert "[WARNING] 5 cards were inserted by someone else during the sync" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from card_engine import cards_to_lists, generate_card_batch
+from card_validation import (
+    ERR_COLUMN_RANGE, ERR_DUPLICATE, ERR_NUMBER_RANGE, ERR_ROW_COUNT, ERR_SHAPE, ERR_VERTICAL_SORT,
+    describe_errors, validate_card_integrity, validate_card_lists, validate_cards
+)
+
+VALID_CARD = np.array([
+    [1, 14, 27, 40, 53, 0, 0],
+    [0, 0, 28, 41, 54, 66, 79],
+    [2, 15, 0, 0, 55, 67, 80],
+], dtype=np.uint8)
+
+
+def _with(row, col, value):
+    card = VALID_CARD.astype(np.int64)
+    card[row, col] = value
+    return card
+
+
+def test_valid_cards():
+    cards = np.concatenate([VALID_CARD[None], generate_card_batch(1000, np.random.default_rng(1))])
+    valid, codes = validate_cards(cards)
+    assert valid.all()
+    assert not codes.any()
+
+
+@pytest.mark.parametrize("card, code", [
+    (_with(0, 0, 0), ERR_ROW_COUNT),
+    (_with(2, 0, 16), ERR_COLUMN_RANGE),
+    (_with(0, 4, 56), ERR_VERTICAL_SORT),
+    (_with(1, 4, 53), ERR_DUPLICATE),
+    (_with(2, 6, 91), ERR_NUMBER_RANGE | ERR_COLUMN_RANGE),
+    (_with(0, 0, -1), ERR_NUMBER_RANGE | ERR_COLUMN_RANGE),
+    (_with(0, 5, 90), ERR_ROW_COUNT | ERR_COLUMN_RANGE | ERR_VERTICAL_SORT),
+])
+def test_error_flags(card, code):
+    valid, codes = validate_cards(np.stack([VALID_CARD, card]))
+    assert valid.tolist() == [True, False]
+    assert codes.tolist() == [0, code]
+
+
+def test_list_input_shape_errors():
+    cards = cards_to_lists(VALID_CARD[None]) + [[[1, 2, 3]], VALID_CARD.tolist()[:2]]
+    valid, codes = validate_card_lists(cards)
+    assert valid.tolist() == [True, False, False]
+    assert codes.tolist() == [0, ERR_SHAPE, ERR_SHAPE]
+
+
+def test_list_input_matches_array_input():
+    card = _with(0, 4, 56)
+    lists = [[[num or None for num in row] for row in card.tolist()]]
+    assert validate_card_lists(lists)[1].tolist() == validate_cards(card[None])[1].tolist()
+
+
+def test_describe_errors():
+    assert describe_errors(0) == ""
+    message = describe_errors(ERR_DUPLICATE | ERR_VERTICAL_SORT)
+    assert "duplicate numbers" in message and "column not sorted ascending" in message
+
+
+def test_validate_card_integrity():
+    assert validate_card_integrity(cards_to_lists(VALID_CARD[None])[0]) == (True, None)
+    assert validate_card_integrity([[None] * 7] * 3) == (False, describe_errors(ERR_ROW_COUNT))
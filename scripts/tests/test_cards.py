@@ -0,0 +1,130 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import cards as cards_module
+from card_engine import cards_to_lists, generate_card_batch
+from card_validation import ERR_DUPLICATE
+from cards import cache_path, load_card_set
+
+
+def _write_cards(path, cards, **extra):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"total_cards": len(cards), **extra, "cards": [
+            {"card_number": i + 1, "numbers": numbers} for i, numbers in enumerate(cards_to_lists(cards))
+        ]}, f)
+
+
+@pytest.fixture
+def card_file(tmp_path):
+    path = str(tmp_path / "all_cards.json")
+    cards = generate_card_batch(300, np.random.default_rng(1))
+    _write_cards(path, cards, counter_seed=5)
+    return path, cards
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    """Fail the test if the card file is parsed instead of read from the cache."""
+    def parse(path, ranges=None):
+        raise AssertionError(f"{path} parsed despite a valid cache")
+    monkeypatch.setattr(cards_module, "_parse", parse)
+
+
+def test_cache_is_written_and_reused(card_file, request):
+    path, cards = card_file
+    card_set = load_card_set(path)
+    assert os.path.exists(cache_path(path))
+
+    request.getfixturevalue("no_parsing")
+    cached = load_card_set(path)
+    np.testing.assert_array_equal(cached.cards, cards)
+    np.testing.assert_array_equal(cached.card_numbers, card_set.card_numbers)
+    assert (cached.total_cards, cached.counter_seed) == (300, 5)
+    assert cached.select([(10, 19)]).card_numbers.tolist() == list(range(10, 20))
+
+
+def test_changed_file_invalidates_the_cache(card_file):
+    path, cards = card_file
+    load_card_set(path)
+    changed = cards[::-1].copy()
+    _write_cards(path, changed)
+    np.testing.assert_array_equal(load_card_set(path).cards, changed)
+
+
+@pytest.mark.parametrize("damage", ["truncated", "empty", "garbage"])
+def test_damaged_cache_is_rebuilt(card_file, damage):
+    path, cards = card_file
+    load_card_set(path)
+    cache = cache_path(path)
+    with open(cache, 'r+b') as f:
+        if damage == "garbage":
+            f.write(b"not a zip file")
+        f.truncate({"truncated": os.path.getsize(cache) // 2, "empty": 0, "garbage": 14}[damage])
+
+    np.testing.assert_array_equal(load_card_set(path).cards, cards)
+    with np.load(cache) as data:
+        np.testing.assert_array_equal(data["cards"], cards)
+
+
+def test_cache_from_another_version_is_ignored(card_file, monkeypatch):
+    path, cards = card_file
+    load_card_set(path)
+    monkeypatch.setattr(cards_module, "CACHE_VERSION", cards_module.CACHE_VERSION + 1)
+    assert cards_module._read_cache(cache_path(path), path) is None
+    np.testing.assert_array_equal(load_card_set(path).cards, cards)
+
+
+def test_first_ranged_load_writes_the_cache(card_file, request):
+    path, cards = card_file
+    card_set = load_card_set(path, [(101, 110)])
+    np.testing.assert_array_equal(card_set.cards, cards[100:110])
+    assert os.path.exists(cache_path(path))
+
+    request.getfixturevalue("no_parsing")
+    np.testing.assert_array_equal(load_card_set(path, [(201, 205)]).cards, cards[200:205])
+
+
+def test_ranges_without_use_cache_do_not_write_one(card_file):
+    path, cards = card_file
+    np.testing.assert_array_equal(load_card_set(path, [(101, 110)], use_cache=False).cards, cards[100:110])
+    assert not os.path.exists(cache_path(path))
+
+
+def test_unchanged_file_is_not_hashed(card_file, monkeypatch):
+    path, cards = card_file
+    load_card_set(path)
+
+    def file_hash(path):
+        raise AssertionError(f"{path} hashed despite an unchanged size and modification time")
+    monkeypatch.setattr(cards_module, "file_hash", file_hash)
+    np.testing.assert_array_equal(load_card_set(path).cards, cards)
+
+
+def test_touched_file_is_hashed_once(card_file, request, monkeypatch):
+    path, cards = card_file
+    load_card_set(path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    request.getfixturevalue("no_parsing")
+    hashed = []
+    file_hash = cards_module.file_hash
+    monkeypatch.setattr(cards_module, "file_hash", lambda path: hashed.append(path) or file_hash(path))
+    for _ in range(2):  # Same contents: the cache is kept and its modification time updated
+        np.testing.assert_array_equal(load_card_set(path).cards, cards)
+    assert hashed == [path]
+
+
+def test_invalid_cards_are_reported(tmp_path):
+    path = str(tmp_path / "all_cards.json")
+    cards = generate_card_batch(3, np.random.default_rng(2))
+    cards[1, 1] = cards[1, 0]  # Same numbers twice on card #2
+    _write_cards(path, cards)
+    for _ in range(2):  # Parsed, then from the cache
+        card_set = load_card_set(path)
+        assert card_set.valid.tolist() == [True, False, True]
+        assert card_set.codes[1] & ERR_DUPLICATE
+        assert len(card_set.errors()) == 1
@@ -0,0 +1,34 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import generate_pdf_cards
+from card_engine import cards_to_lists, generate_card_batch
+
+
+@pytest.fixture
+def pdf_job(tmp_path, monkeypatch):
+    path = str(tmp_path / "all_cards.json")
+    cards = generate_card_batch(8, np.random.default_rng(1))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"cards": [{"card_number": i + 1, "numbers": numbers}
+                             for i, numbers in enumerate(cards_to_lists(cards))]}, f)
+    for name, value in [("CARDS_JSON_FILE", path), ("OUTPUT_PDF", str(tmp_path / "cartelle.pdf")),
+                        ("START_CARD", 1), ("END_CARD", 8), ("PRINT_DPI", None),
+                        ("PDF_MIN_PAGES_PER_WORKER", 1)]:
+        monkeypatch.setattr(generate_pdf_cards, name, value)
+    return str(tmp_path / "cartelle.pdf")
+
+
+def test_workers_without_pypdf_render_in_process(pdf_job, monkeypatch, capsys):
+    def render_shards(*args, **kwargs):
+        raise AssertionError("shards rendered without pypdf to merge them")
+    monkeypatch.setattr(generate_pdf_cards, "PdfWriter", None)
+    monkeypatch.setattr(generate_pdf_cards, "render_shards", render_shards)
+
+    generate_pdf_cards.generate_pdf(workers=2)
+    assert "[WARNING] pypdf is not installed" in capsys.readouterr().out
+    with open(pdf_job, 'rb') as f:
+        assert f.read(5) == b"%PDF-"